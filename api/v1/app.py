@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """ A script return the status of the API """
 
+from api.v1.compression import compress
 from api.v1.views import app_views
 from flask import Flask, jsonify, make_response
 from flask_cors import CORS
@@ -10,6 +11,7 @@ from models import storage
 app = Flask(__name__)
 app.register_blueprint(app_views)
 cors = CORS(app, resources={r"/api/*": {"origins": "0.0.0.0"}})
+app.after_request(compress)
 host = getenv("HBNB_API_HOST", "0.0.0.0")
 port = getenv("HBNB_API_PORT", "5000")
 
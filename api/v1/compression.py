@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""
+negotiated compression of the API responses
+    gzip, and brotli (br) or zstd when their module is installed, for
+    responses of at least HBNB_API_COMPRESS_MIN_SIZE bytes (1024) at
+    HBNB_API_COMPRESS_LEVEL (the default of each codec)
+"""
+
+from collections import OrderedDict
+from flask import request
+import gzip
+from os import getenv
+import threading
+
+
+def gzip_compress(data, level):
+    """returns data compressed by gzip at level, without a timestamp"""
+    return gzip.compress(data, level, mtime=0)
+
+
+# dictionary - encoding: (compress function, default level, min, max), in
+# order of preference
+codecs = OrderedDict()
+try:
+    import brotli
+    codecs["br"] = (lambda data, level: brotli.compress(data, quality=level),
+                    5, 0, 11)
+except ImportError:
+    pass
+try:
+    import zstandard
+    codecs["zstd"] = (lambda data, level: zstandard.ZstdCompressor(
+        level=level).compress(data), 3, 1, 22)
+except ImportError:
+    pass
+codecs["gzip"] = (gzip_compress, 6, 1, 9)
+
+min_size = int(getenv("HBNB_API_COMPRESS_MIN_SIZE", "1024"))
+level = getenv("HBNB_API_COMPRESS_LEVEL")
+# int - number of compressed bodies kept by (ETag, encoding)
+cache_size = int(getenv("HBNB_API_COMPRESS_CACHE", "256"))
+cache = OrderedDict()
+cache_lock = threading.Lock()
+compressible = ("application/json", "text/")
+
+
+def negotiate():
+    """returns the encoding to use for the request, or None"""
+    return request.accept_encodings.best_match(list(codecs))
+
+
+def compress(response):
+    """
+    Compresses the body of response with the encoding negotiated with
+    the client. Bodies with a strong ETag are the same for that ETag, so
+    they are compressed once and then served from a cache.
+    """
+    if response.status_code == 304:
+        # the client holds the ETag of the representation it was sent
+        etag, weak = response.get_etag()
+        for encoding in codecs:
+            if etag and request.if_none_match.contains(
+                    etag + "-" + encoding):
+                response.set_etag(etag + "-" + encoding)
+                response.vary.add("Accept-Encoding")
+        return response
+    if (response.status_code != 200 or response.direct_passthrough or
+            response.is_streamed or "Content-Encoding" in response.headers or
+            not response.mimetype.startswith(compressible)):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate()
+    if encoding is None or response.content_length is None or \
+            response.content_length < min_size:
+        return response
+    etag, weak = response.get_etag()
+    key = (etag, encoding)
+    data = None
+    if etag and not weak:
+        with cache_lock:
+            data = cache.get(key)
+            if data is not None:
+                cache.move_to_end(key)
+    if data is None:
+        function, default, low, high = codecs[encoding]
+        data = function(response.get_data(),
+                        min(max(int(level or default), low), high))
+        if etag and not weak and cache_size > 0:
+            with cache_lock:
+                cache[key] = data
+                while len(cache) > cache_size:
+                    cache.popitem(last=False)
+    response.set_data(data)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        # another representation: another strong ETag
+        response.set_etag(etag + "-" + encoding, weak)
+    return response
@@ -9,6 +9,8 @@ flask RESTful API
 """
 
 from api.v1.views import app_views
+from api.v1.views.conditional import object_response
+from api.v1.views.pagination import paginate
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.amenity import Amenity
@@ -19,12 +21,9 @@ from models.amenity import Amenity
                  strict_slashes=False)
 def get_all_amenities():
     """
-    Retrieves the list of all Amenity objects.
+    Retrieves the list of all Amenity objects, one page at a time.
     """
-    l_amenities = []
-    for a in storage.all(Amenity).values():
-        l_amenities.append(a.to_dict())
-    return jsonify(l_amenities)
+    return paginate(Amenity)
 
 
 @app_views.route("/amenities/<amenity_id>/",
@@ -38,7 +37,7 @@ def get_amenity(amenity_id):
     a = storage.get("Amenity", amenity_id)
     if a is None:
         abort(404)
-    return jsonify(a.to_dict())
+    return object_response(a)
 
 
 @app_views.route("/amenities/<amenity_id>",
@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+"""
+flask RESTful API
+    POST /api/v1/batch
+        {"requests": [{"method": "POST", "path": "/api/v1/...",
+                       "body": {...}}, ...],
+         "atomic": false}
+    runs each request in order through the API views, with one storage
+    commit at the end, and returns {"committed": bool, "responses":
+    [{"status": <code>, "body": <JSON>}, ...]}
+"""
+
+from api.v1.views import app_views
+from flask import abort, current_app, jsonify, request
+from models import storage
+from os import getenv
+from werkzeug.exceptions import HTTPException
+
+max_batch_size = int(getenv("HBNB_API_MAX_BATCH_SIZE", "1000"))
+methods = ("GET", "POST", "PUT", "DELETE")
+
+
+@app_views.route("/batch", methods=["POST"], strict_slashes=False)
+def post_batch():
+    """
+    Runs a list of API requests in one storage transaction. Without
+    atomic, every request runs and the ones that succeeded are
+    committed; with atomic, the first one to fail stops the batch and
+    nothing is committed. A server error always discards the batch.
+    """
+    data = request.get_json(silent=True)
+    if type(data) is not dict or type(data.get("requests")) is not list:
+        abort(400, description="Not a JSON")
+    items = data["requests"]
+    if len(items) > max_batch_size:
+        abort(400, description="Too many requests")
+    for item in items:
+        if type(item) is not dict or item.get("method") not in methods or \
+                type(item.get("path")) is not str or \
+                not item["path"].startswith(app_views.url_prefix + "/") or \
+                endpoint(item) == "app_views.post_batch":
+            abort(400, description="Invalid request")
+    atomic = data.get("atomic") is True
+    responses = []
+    storage.begin()
+    try:
+        for item in items:
+            status, body = run(item)
+            responses.append({"status": status, "body": body})
+            if atomic and status >= 400:
+                break
+    except Exception:
+        storage.rollback()
+        raise
+    committed = not (atomic and responses and responses[-1]["status"] >= 400)
+    if committed:
+        storage.commit()
+    else:
+        storage.rollback()
+    return jsonify({"committed": committed, "responses": responses})
+
+
+def endpoint(item):
+    """
+    Returns the endpoint the path and method of one request of a batch
+    are routed to, or None if they are not routed.
+    """
+    adapter = current_app.url_map.bind(request.host)
+    try:
+        return adapter.match(item["path"].split("?")[0], item["method"])[0]
+    except HTTPException:
+        return None
+
+
+def run(item):
+    """
+    Returns the status code and JSON body of the response of the view of
+    one request of a batch. Errors are returned as {"error": <message>}.
+    """
+    kwargs = {"method": item["method"]}
+    if "body" in item:
+        kwargs["json"] = item["body"]
+    with current_app.test_request_context(item["path"], **kwargs):
+        try:
+            response = current_app.make_response(
+                current_app.preprocess_request() or
+                current_app.dispatch_request())
+        except HTTPException as e:
+            response = current_app.handle_http_exception(e)
+            if response is e:
+                response = jsonify({"error": e.description}), e.code
+            response = current_app.make_response(response)
+        return response.status_code, response.get_json(silent=True)
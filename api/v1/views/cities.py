@@ -9,6 +9,8 @@ flask RESTful API
 """
 
 from api.v1.views import app_views
+from api.v1.views.conditional import object_response
+from api.v1.views.pagination import paginate
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.city import City
@@ -20,17 +22,14 @@ from models.state import State
                  strict_slashes=False)
 def get_cities(state_id):
     """
-    Retrieves the list of all City objects of a State.
-    If the state_id is not linked to any State object,
+    Retrieves the list of all City objects of a State, one page at a
+    time. If the state_id is not linked to any State object,
         raise a 404 error
     """
-    ct = []
     st = storage.get(State, state_id)
     if st is None:
         abort(404)
-    for city in st.cities:
-        ct.append(city.to_dict())
-    return jsonify(ct)
+    return paginate(City, {"state_id": st.id})
 
 
 @app_views.route("/cities/<city_id>/",
@@ -44,7 +43,7 @@ def get_city(city_id):
     ct = storage.get("City", city_id)
     if ct is None:
         abort(404)
-    return jsonify(ct.to_dict())
+    return object_response(ct)
 
 
 @app_views.route("/cities/<city_id>",
@@ -88,7 +87,7 @@ def post_city(state_id):
         abort(400, description="Missing name")
     else:
         ct = City(**data)
-        ct.state_id = ct.id
+        ct.state_id = st.id
         ct.save()
         return make_response(jsonify(ct.to_dict()), 201)
 
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""
+conditional GET of the API resources
+    responses carry a strong ETag, a request whose If-None-Match holds
+    the current one gets 304 Not Modified without the body being built
+    ?fields=<name>,<name>: only those keys of each object
+"""
+
+from api.v1.compression import codecs
+from flask import jsonify, make_response, request
+import hashlib
+from models import storage
+import uuid
+
+# file storage versions count the writes seen by this process: collection
+# ETags of two processes must never match
+boot = uuid.uuid4().hex
+
+
+def collection_etag(cls, representation="json"):
+    """
+    Returns the ETag of the requested page of a collection of cls, made
+    of the version of cls, the requested path and query, and the
+    representation negotiated for it ("json" or "ndjson").
+    """
+    key = "{}:{}:{}:{}".format(boot, storage.version(cls), request.full_path,
+                               representation)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def requested_fields():
+    """
+    Returns the list of keys requested by ?fields=, or None for all.
+    """
+    fields = request.args.get("fields")
+    if fields is None:
+        return None
+    return [name for name in fields.split(",") if name]
+
+
+def object_etag(obj):
+    """
+    Returns the ETag of obj, made of its class, id and updated_at, and of
+    the requested fields.
+    """
+    key = "{}.{}:{}:{}".format(type(obj).__name__, obj.id, obj.updated_at,
+                               request.args.get("fields"))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def conditional(etag, build):
+    """
+    Returns 304 Not Modified if the request holds etag in If-None-Match,
+    or the ETag of a compressed representation of it, or else the
+    response returned by build. Both carry etag.
+    """
+    if any(request.if_none_match.contains(etag + suffix) for suffix in
+           [""] + ["-" + encoding for encoding in codecs]):
+        response = make_response("", 304)
+    else:
+        response = build()
+    response.set_etag(etag)
+    return response
+
+
+def object_response(obj):
+    """
+    Returns the JSON of obj, or of its requested fields, or 304 Not
+    Modified if the client has it.
+    """
+    return conditional(object_etag(obj), lambda: jsonify(
+        obj.to_dict(fields=requested_fields())))
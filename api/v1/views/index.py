@@ -4,8 +4,8 @@ flask with general routes
 """
 
 from api.v1.views import app_views
-from flask import jsonify
-from models import storage
+from flask import abort, jsonify
+from models import storage, storage_t
 
 
 classes = {
@@ -26,14 +26,35 @@ def status():
     return jsonify({"status": "OK"})
 
 
+@app_views.route("/status/pool", strict_slashes=False)
+def pool_status():
+    """
+    Statistics of the database connection pool
+    """
+    if storage_t != "db":
+        abort(404)
+    return jsonify(storage.pool_stats())
+
+
+@app_views.route("/status/cache", strict_slashes=False)
+def cache_status():
+    """
+    Statistics of the database read cache
+    """
+    if storage_t != "db":
+        abort(404)
+    return jsonify(storage.cache_stats())
+
+
 @app_views.route("/stats", strict_slashes=False)
 def stats():
     """
     Retrieve the number of each objects by type.
     """
+    counts = storage.counts()
     statistics = {}
 
     for key, value in classes.items():
-        statistics[key] = storage.count(value)
+        statistics[key] = counts.get(value, 0)
 
     return jsonify(statistics)
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""
+cursor pagination of the API collections
+    ?limit=<n>: objects per page, at most HBNB_API_MAX_PAGE_SIZE (100)
+    ?cursor=<cursor>: the page after the one that returned the cursor
+    ?stream=1 or Accept: application/x-ndjson: the whole collection, one
+        JSON object per line, streamed as it is read
+"""
+
+from api.v1.views.conditional import collection_etag, conditional, \
+    requested_fields
+from flask import Response, abort, jsonify, request, stream_with_context, \
+    url_for
+import json
+from models import storage
+from os import getenv
+
+max_page_size = int(getenv("HBNB_API_MAX_PAGE_SIZE", "100"))
+
+
+def paginate(cls, filters=None):
+    """
+    Returns the JSON list of one page of the objects of cls matching
+    filters. When more objects follow, the Link header holds the URL of
+    the next page and X-Next-Cursor its cursor. The page is not read if
+    the client already has it (304 Not Modified). The page and the
+    stream of the same URL are two representations told apart by the
+    Accept header, with their own ETags.
+    """
+    if streaming():
+        response = conditional(collection_etag(cls, "ndjson"),
+                               lambda: stream_response(cls, filters))
+    else:
+        limit = request.args.get("limit", str(max_page_size))
+        if not limit.isdigit() or int(limit) < 1:
+            abort(400, description="Invalid limit")
+        limit = min(int(limit), max_page_size)
+        response = conditional(collection_etag(cls),
+                               lambda: page_response(cls, filters, limit))
+    response.vary.add("Accept")
+    return response
+
+
+def page_response(cls, filters, limit):
+    """
+    Returns the JSON list of one page of the objects of cls, of at most
+    limit objects, with its Link and X-Next-Cursor headers. Only the
+    requested fields are read and serialized.
+    """
+    fields = requested_fields()
+    try:
+        objs, cursor = storage.page(cls, request.args.get("cursor"), limit,
+                                    filters=filters, fields=fields)
+    except ValueError:
+        abort(400, description="Invalid cursor")
+    response = jsonify([obj.to_dict(fields=fields) for obj in objs])
+    if cursor is not None:
+        args = request.args.to_dict()
+        args.update(request.view_args)
+        args.update(cursor=cursor, limit=limit)
+        response.headers["Link"] = '<{}>; rel="next"'.format(
+            url_for(request.endpoint, _external=True, **args))
+        response.headers["X-Next-Cursor"] = cursor
+    return response
+
+
+def streaming():
+    """
+    Returns True if the request asks for the NDJSON stream.
+    """
+    best = request.accept_mimetypes.best_match(
+        ["application/json", "application/x-ndjson"])
+    return request.args.get("stream") == "1" or \
+        best == "application/x-ndjson"
+
+
+def stream_response(cls, filters):
+    """
+    Returns the streamed NDJSON of the objects of cls matching filters:
+    each object is read from storage.stream() and serialized as the
+    client reads, so memory and time to first byte do not grow with the
+    collection.
+    """
+    def generate():
+        """yields the lines of JSON of up to 100 objects at a time"""
+        lines = []
+        fields = requested_fields()
+        for obj in storage.stream(cls, filters=filters, fields=fields):
+            lines.append(json.dumps(obj.to_dict(fields=fields)) + "\n")
+            if len(lines) == 100:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+    return Response(stream_with_context(generate()),
+                    mimetype="application/x-ndjson")
@@ -5,10 +5,13 @@ flask RESTful API
     GET /api/v1/places/<place_id>
     DELETE /api/v1/places/<place_id>
     POST /api/v1/cities/<city_id>/places
+    POST /api/v1/places_search
     PUT /api/v1/places/<place_id>
 """
 
 from api.v1.views import app_views
+from api.v1.views.conditional import object_response, requested_fields
+from api.v1.views.pagination import paginate
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.city import City
@@ -21,17 +24,14 @@ from models.user import User
                  strict_slashes=False)
 def get_places(city_id):
     """
-    Retrieves the list of all Place objects of a City.
-    If the city_id is not linked to any City object,
+    Retrieves the list of all Place objects of a City, one page at a
+    time. If the city_id is not linked to any City object,
         raise a 404 error
     """
-    pl = []
     ct = storage.get(City, city_id)
     if ct is None:
         abort(404)
-    for place in ct.places:
-        pl.append(place.to_dict())
-    return jsonify(pl)
+    return paginate(Place, {"city_id": ct.id})
 
 
 @app_views.route("/places/<place_id>/",
@@ -45,7 +45,7 @@ def get_place(place_id):
     pl = storage.get("Place", place_id)
     if pl is None:
         abort(404)
-    return jsonify(pl.to_dict())
+    return object_response(pl)
 
 
 @app_views.route("/places/<place_id>",
@@ -94,7 +94,7 @@ def post_place(city_id):
         if 'name' not in data:
             abort(400, description="Missing name")
         pl = Place(**data)
-        pl.city_id = pl.id
+        pl.city_id = ct.id
         pl.save()
         return make_response(jsonify(pl.to_dict()), 201)
 
@@ -123,3 +123,30 @@ def put_place(places_id):
             setattr(pl, k, v)
     pl.save()
     return make_response(jsonify(pl.to_dict()), 200)
+
+
+@app_views.route("/places_search",
+                 methods=["POST"],
+                 strict_slashes=False)
+def places_search():
+    """
+    Retrieves the Place objects matching the JSON body:
+        states: list of State ids, cities: list of City ids; the places
+        of all these cities, or of every city if both are empty.
+        amenities: list of Amenity ids the places must all have.
+    If the HTTP body request is not valid JSON,
+        raise a 400 error with the message Not a JSON.
+    """
+    data = request.get_json(silent=True)
+    if type(data) is not dict:
+        abort(400, description="Not a JSON")
+    filters = {}
+    for key in ("states", "cities", "amenities"):
+        ids = data.get(key) or []
+        if type(ids) is not list or \
+                not all(type(id) is str for id in ids):
+            abort(400, description="Invalid " + key)
+        filters[key] = ids
+    fields = requested_fields()
+    return jsonify([pl.to_dict(fields=fields)
+                    for pl in storage.places_search(**filters)])
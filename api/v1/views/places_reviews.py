@@ -9,6 +9,8 @@ flask RESTful API
 """
 
 from api.v1.views import app_views
+from api.v1.views.conditional import object_response
+from api.v1.views.pagination import paginate
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.place import Place
@@ -20,17 +22,14 @@ from models.review import Review
                  strict_slashes=False)
 def get_reviews(place_id):
     """
-    Retrieves the list of all review objects of a Place.
-    If the place_id is not linked to any Place object,
+    Retrieves the list of all review objects of a Place, one page at a
+    time. If the place_id is not linked to any Place object,
         raise a 404 error
     """
-    rv = []
     pl = storage.get(Place, place_id)
     if pl is None:
         abort(404)
-    for review in pl.reviews:
-        rv.append(review.to_dict())
-    return jsonify(rv)
+    return paginate(Review, {"place_id": pl.id})
 
 
 @app_views.route("/reviews/<review_id>/",
@@ -44,7 +43,7 @@ def get_review(review_id):
     rv = storage.get("Review", review_id)
     if rv is None:
         abort(404)
-    return jsonify(rv.to_dict())
+    return object_response(rv)
 
 
 @app_views.route("/reviews/<review_id>",
@@ -95,7 +94,7 @@ def post_review(place_id):
         if us is None:
             abort(404)
         rv = Review(**data)
-        rv.place_id = rv.id
+        rv.place_id = pl.id
         rv.save()
         return make_response(jsonify(rv.to_dict()), 201)
 
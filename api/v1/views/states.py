@@ -9,6 +9,8 @@ flask RESTful API
 """
 
 from api.v1.views import app_views
+from api.v1.views.conditional import object_response
+from api.v1.views.pagination import paginate
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.state import State
@@ -16,11 +18,8 @@ from models.state import State
 
 @app_views.route("/states", strict_slashes=False)
 def states():
-    """Retrieve the list of all `State` objects"""
-    result = []
-    for value in storage.all(State).values():
-        result.append(value.to_dict())
-    return jsonify(result)
+    """Retrieve the list of all `State` objects, one page at a time"""
+    return paginate(State)
 
 
 @app_views.route("/states/<state_id>", strict_slashes=False)
@@ -36,7 +35,7 @@ def state(state_id: str):
     result = storage.get(State, state_id)
     if result is None:
         abort(404)
-    return jsonify(result.to_dict())
+    return object_response(result)
 
 
 @app_views.route("/states/<state_id>",
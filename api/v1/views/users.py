@@ -9,6 +9,8 @@ flask RESTful API
 """
 
 from api.v1.views import app_views
+from api.v1.views.conditional import object_response
+from api.v1.views.pagination import paginate
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.user import User
@@ -19,12 +21,9 @@ from models.user import User
                  strict_slashes=False)
 def get_all_users():
     """
-    Retrieves the list of all User objects.
+    Retrieves the list of all User objects, one page at a time.
     """
-    l_users = []
-    for u in storage.all(User).values():
-        l_users.append(u.to_dict())
-    return jsonify(l_users)
+    return paginate(User)
 
 
 @app_views.route("/users/<user_id>",
@@ -38,7 +37,7 @@ def get_user(user_id):
     u = storage.get("User", user_id)
     if u is None:
         abort(404)
-    return jsonify(u.to_dict())
+    return object_response(u)
 
 
 @app_views.route("/users/<user_id>",
@@ -8,7 +8,12 @@ from os import getenv
 
 storage_t = getenv("HBNB_TYPE_STORAGE")
 
-if storage_t == "db":
+if storage_t == "sqlite":
+    # SQLite uses the same SQLAlchemy mapping as the MySQL storage
+    storage_t = "db"
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage()
+elif storage_t == "db":
     from models.engine.db_storage import DBStorage
     storage = DBStorage()
 else:
@@ -23,8 +23,8 @@ class BaseModel:
     """The BaseModel class from which future classes will be derived"""
     if models.storage_t == "db":
         id = Column(String(60), primary_key=True)
-        created_at = Column(DateTime, default=datetime.utcnow)
-        updated_at = Column(DateTime, default=datetime.utcnow)
+        created_at = Column(DateTime, default=datetime.utcnow, index=True)
+        updated_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     def __init__(self, *args, **kwargs):
         """Initialization of the base model"""
@@ -47,6 +47,12 @@ class BaseModel:
             self.created_at = datetime.utcnow()
             self.updated_at = self.created_at
 
+    if models.storage_t != "db":
+        def __setattr__(self, key, value):
+            """sets an attribute and marks the instance as changed"""
+            super().__setattr__(key, value)
+            models.storage.mark_dirty(self)
+
     def __str__(self):
         """String representation of the BaseModel class"""
         return "[{:s}] ({:s}) {}".format(self.__class__.__name__, self.id,
@@ -58,16 +64,29 @@ class BaseModel:
         models.storage.new(self)
         models.storage.save()
 
-    def to_dict(self, safe_pass=True):
-        """returns a dictionary containing all keys/values of the instance"""
-        new_dict = self.__dict__.copy()
+    def to_dict(self, safe_pass=True, fields=None):
+        """returns a dictionary containing all keys/values of the instance
+
+        With fields, a list of keys, only those keys are built.
+        """
+        attrs = self.__dict__
+        if fields is None:
+            new_dict = attrs.copy()
+        else:
+            new_dict = {key: attrs[key] for key in fields if key in attrs}
         if "created_at" in new_dict:
             new_dict["created_at"] = new_dict["created_at"].strftime(time)
         if "updated_at" in new_dict:
             new_dict["updated_at"] = new_dict["updated_at"].strftime(time)
-        new_dict["__class__"] = self.__class__.__name__
+        if fields is None or "__class__" in fields:
+            new_dict["__class__"] = self.__class__.__name__
         if "_sa_instance_state" in new_dict:
             del new_dict["_sa_instance_state"]
+        # loaded relationships are objects, not attributes
+        mapper = getattr(type(self), "__mapper__", None)
+        if mapper is not None:
+            for key in mapper.relationships.keys():
+                new_dict.pop(key, None)
         if safe_pass is True:
             if "password" in new_dict:
                 del new_dict["password"]
@@ -5,68 +5,541 @@ Contains the class DBStorage
 
 import models
 from models.amenity import Amenity
-from models.base_model import BaseModel, Base
+from models.base_model import BaseModel, Base, time
 from models.city import City
+from models.engine.pagination import decode_cursor, encode_cursor
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import Column, DateTime, Integer, String, Table, \
+    create_engine, func, insert, literal, select, tuple_, union_all, update
+from sqlalchemy.orm import load_only, make_transient_to_detached, \
+    scoped_session, selectinload, sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.pool import QueuePool
+from collections import OrderedDict
+from datetime import datetime
+import threading
+from time import monotonic, perf_counter
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
+# a counter per class, incremented in the transaction of every write to it
+if models.storage_t == "db":
+    versions = Table("table_versions", Base.metadata,
+                     Column("name", String(60), primary_key=True),
+                     Column("version", Integer, nullable=False, default=0))
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection"""
+    def __init__(self, *args, **kwargs):
+        """Instantiate a TimedQueuePool object"""
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.__lock = threading.Lock()
+
+    def _do_get(self):
+        """checks out a connection, timing the wait"""
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        except sqlalchemy.exc.TimeoutError:
+            with self.__lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = perf_counter() - start
+            with self.__lock:
+                self.waits += 1
+                self.wait_time += wait
+                self.max_wait = max(self.max_wait, wait)
+
+
+class ReadCache:
+    """LRU cache of read results, each kept for at most ttl seconds
+
+    Object entries are keyed by (<class name>, id). invalidate() drops one
+    and bumps the version of its class; entries computed from a whole
+    class (counts, lists of IDs) carry that version in their key, so the
+    ones read before a write are never read again and age out.
+    """
+    def __init__(self, size=0, ttl=60):
+        """Instantiate a ReadCache object
+
+        Args:
+            size (int, optional): the maximum number of entries, 0 disables
+                the cache. Defaults to 0.
+            ttl (float, optional): seconds an entry stays valid.
+        """
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.__entries = OrderedDict()
+        self.__versions = {}
+        self.__lock = threading.Lock()
+
+    def version(self, name):
+        """returns the number of writes seen to the class called name"""
+        return self.__versions.get(name, 0)
+
+    def get(self, key):
+        """returns the value cached at key, or None"""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or entry[0] < monotonic():
+                if entry is not None:
+                    del self.__entries[key]
+                self.misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, version=None):
+        """caches value at key, evicting the least recently used entries
+
+        With version, the value is only cached if the class named key[0]
+        was not written to since version was read.
+        """
+        if self.size <= 0:
+            return
+        with self.__lock:
+            if version is not None and self.version(key[0]) != version:
+                return
+            self.__entries[key] = (monotonic() + self.ttl, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.size:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, name, id=None):
+        """forgets the object name.id and everything read from its class"""
+        with self.__lock:
+            self.__versions[name] = self.version(name) + 1
+            if id is not None:
+                self.__entries.pop((name, id), None)
+            self.invalidations += 1
+
+    def stats(self):
+        """returns the size, the number of entries and the counters"""
+        return {"size": self.size, "ttl": self.ttl,
+                "entries": len(self.__entries), "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "invalidations": self.invalidations}
+
 
 class DBStorage:
     """interaacts with the MySQL database"""
     __engine = None
     __session = None
+    __cache = None
 
-    def __init__(self):
-        """Instantiate a DBStorage object"""
+    def __init__(self, engine=None):
+        """Instantiate a DBStorage object
+
+        Args:
+            engine (Engine, optional): the engine to use. Defaults to the
+                MySQL database given by the HBNB_MYSQL_* variables.
+        """
         HBNB_MYSQL_USER = getenv('HBNB_MYSQL_USER')
         HBNB_MYSQL_PWD = getenv('HBNB_MYSQL_PWD')
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
-                                      format(HBNB_MYSQL_USER,
-                                             HBNB_MYSQL_PWD,
-                                             HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+        if engine is None:
+            engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
+                                   format(HBNB_MYSQL_USER,
+                                          HBNB_MYSQL_PWD,
+                                          HBNB_MYSQL_HOST,
+                                          HBNB_MYSQL_DB),
+                                   poolclass=TimedQueuePool,
+                                   **self.pool_options())
+        self.__engine = engine
+        self.__cache = ReadCache(int(getenv('HBNB_DB_CACHE_SIZE', '0')),
+                                 float(getenv('HBNB_DB_CACHE_TTL', '60')))
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
-        """query on the current database session"""
+    @staticmethod
+    def pool_options():
+        """Reads the connection pool settings from the environment
+
+        Returns:
+            the create_engine keyword arguments given by
+                HBNB_MYSQL_POOL_SIZE, HBNB_MYSQL_MAX_OVERFLOW,
+                HBNB_MYSQL_POOL_TIMEOUT (seconds), HBNB_MYSQL_POOL_RECYCLE
+                (seconds) and HBNB_MYSQL_POOL_PRE_PING (1 or 0). Unset
+                variables keep the SQLAlchemy defaults.
+        """
+        options = {}
+        for var, name, conv in (("POOL_SIZE", "pool_size", int),
+                                ("MAX_OVERFLOW", "max_overflow", int),
+                                ("POOL_TIMEOUT", "pool_timeout", float),
+                                ("POOL_RECYCLE", "pool_recycle", int),
+                                ("POOL_PRE_PING", "pool_pre_ping", int)):
+            value = getenv('HBNB_MYSQL_' + var)
+            if value:
+                options[name] = conv(value)
+        if "pool_pre_ping" in options:
+            options["pool_pre_ping"] = bool(options["pool_pre_ping"])
+        return options
+
+    def pool_stats(self):
+        """Reports the state of the connection pool
+
+        Returns:
+            a dictionary with the pool size, the connections checked out
+                and in, the overflow in use, and for a TimedQueuePool the
+                number of checkouts, their total and longest wait in
+                seconds and the number that timed out.
+        """
+        pool = self.__engine.pool
+        stats = {"pool": type(pool).__name__}
+        for name, method in (("size", "size"),
+                             ("checked_out", "checkedout"),
+                             ("checked_in", "checkedin"),
+                             ("overflow", "overflow")):
+            if hasattr(pool, method):
+                stats[name] = getattr(pool, method)()
+        for name in ("waits", "wait_time", "max_wait", "timeouts"):
+            if hasattr(pool, name):
+                stats[name] = getattr(pool, name)
+        return stats
+
+    def cache_stats(self):
+        """Reports the state of the read cache
+
+        Returns:
+            a dictionary with the cache size, TTL and number of entries,
+                and its hit, miss, eviction and invalidation counters.
+        """
+        return self.__cache.stats()
+
+    def version(self, cls):
+        """Returns the version of the objects of a class.
+
+        Args:
+            cls (BaseModel): the class.
+        Returns:
+            a string that changes whenever an object of cls is added,
+                saved, updated or deleted, by this process or another:
+                the counter of cls in table_versions, which every write
+                increments in its own transaction, read by primary key
+                (or from the read cache).
+        """
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            return ""
+        key = ("version", cls.__name__, self.__cache.version(cls.__name__))
+        version = self.__cache.get(key)
+        if version is None:
+            version = str(self.__session.execute(
+                select(versions.c.version).where(
+                    versions.c.name == cls.__name__)).scalar() or 0)
+            self.__cache.put(key, version)
+        return version
+
+    def __bump(self, names):
+        """increments the counters of the classes called names in the
+        current transaction"""
+        # always in the same order, so that writers cannot deadlock
+        names = sorted(set(names))
+        if not names:
+            return
+        result = self.__session.execute(
+            update(versions).where(versions.c.name.in_(names))
+            .values(version=versions.c.version + 1))
+        if result.rowcount < len(names):
+            found = {name for name, in self.__session.execute(
+                select(versions.c.name).where(versions.c.name.in_(names)))}
+            self.__session.execute(insert(versions), [
+                {"name": name, "version": 1}
+                for name in names if name not in found])
+
+    def all(self, cls=None, load=None):
+        """query on the current database session
+
+        load lists relationship paths such as "cities" or "places.reviews"
+        to load for every object in one extra SELECT per path instead of
+        one per object when they are first accessed.
+        """
         new_dict = {}
         for clss in classes:
             if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
+                objs = self.__session.query(classes[clss]).options(
+                    *self.__load(classes[clss], load)).all()
                 for obj in objs:
                     key = obj.__class__.__name__ + '.' + obj.id
                     new_dict[key] = obj
         return (new_dict)
 
+    @staticmethod
+    def __load(cls, load):
+        """returns the selectinload options for the paths of load"""
+        options = []
+        for path in load or ():
+            owner, option = cls, None
+            for name in path.split("."):
+                attr = getattr(owner, name, None)
+                if not hasattr(attr, "property") or \
+                        not hasattr(attr.property, "mapper"):
+                    raise ValueError("{} has no relationship {}".format(
+                        owner.__name__, name))
+                if option is None:
+                    option = selectinload(attr)
+                else:
+                    option = option.selectinload(attr)
+                owner = attr.property.mapper.class_
+            options.append(option)
+        return options
+
+    def stream(self, cls=None, chunk=1000, filters=None, fields=None):
+        """yields the objects of the database one at a time
+
+        Unlike all(), rows are fetched from a server-side cursor chunk
+        rows at a time and never collected in a dictionary, so memory
+        stays bounded whatever the size of the tables. filters gives
+        column values the objects must have, fields the only columns to
+        load (see page()).
+        """
+        for clss in classes:
+            if cls is None or cls is classes[clss] or cls is clss:
+                query = self.__session.query(classes[clss]).options(
+                    *self.__load_only(classes[clss], fields))
+                for name, value in (filters or {}).items():
+                    if name not in classes[clss].__table__.columns:
+                        raise ValueError("{} has no column {}".format(
+                            clss, name))
+                    query = query.filter(
+                        getattr(classes[clss], name) == value)
+                for obj in query.yield_per(chunk):
+                    yield obj
+
+    @staticmethod
+    def __load_only(cls, fields, *needed):
+        """returns the load_only option for the columns of fields"""
+        if fields is None:
+            return []
+        columns = cls.__table__.columns
+        names = {name for name in fields if name in columns}
+        names.update(("id",) + needed)
+        return [load_only(*(getattr(cls, name) for name in sorted(names)))]
+
+    def page(self, cls, after=None, limit=100, order_by="created_at",
+             filters=None, fields=None):
+        """Retrieves one page of the objects of a class.
+
+        Args:
+            cls (BaseModel): the class.
+            after (string, optional): the cursor returned with the previous
+                page. Defaults to the first page.
+            limit (int, optional): the maximum number of objects.
+            order_by (string, optional): the column to sort by, the ID
+                breaks ties. Defaults to "created_at".
+            filters (dict, optional): column values the objects must have.
+            fields (list, optional): the only columns to load, with the ID
+                and order_by; the others are deferred. Defaults to all.
+        Returns:
+            the list of objects and the cursor of the next page, or None
+                after the last page. Rows are selected with WHERE
+                (order_by, id) > (cursor) ORDER BY order_by, id LIMIT, so
+                a cursor stays valid whatever is inserted meanwhile.
+        Raises:
+            ValueError: if cls, order_by, a filter or after is invalid.
+        """
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            raise ValueError("invalid class")
+        columns = cls.__table__.columns
+        for name in [order_by] + list(filters or {}):
+            if name not in columns:
+                raise ValueError("{} has no column {}".format(
+                    cls.__name__, name))
+        column = getattr(cls, order_by)
+        query = self.__session.query(cls).options(
+            *self.__load_only(cls, fields, order_by))
+        for name, value in (filters or {}).items():
+            query = query.filter(getattr(cls, name) == value)
+        if after:
+            value, id = decode_cursor(after)
+            if isinstance(columns[order_by].type, DateTime) and value:
+                if type(value) is not str:
+                    raise ValueError("invalid cursor")
+                value = datetime.strptime(value, time)
+            query = query.filter(tuple_(column, cls.id) > tuple_(value, id))
+        objs = query.order_by(column, cls.id).limit(limit + 1).all()
+        if len(objs) <= limit:
+            return objs, None
+        objs = objs[:limit]
+        last = objs[-1]
+        return objs, encode_cursor(getattr(last, order_by), last.id)
+
     def new(self, obj):
         """add the object to the current database session"""
         self.__session.add(obj)
+        self.__cache.invalidate(type(obj).__name__, obj.id)
+
+    def new_many(self, objs):
+        """adds every object of objs and commits them in one transaction
+
+        Rows of one table are sent in batched INSERT statements.
+        """
+        self.__session.add_all(objs)
+        self.save()
+
+    def update_many(self, cls, updates):
+        """Updates several objects of one class in one transaction.
+
+        Args:
+            cls (BaseModel): the class.
+            updates (dict): the attributes to set, by object ID. id,
+                created_at, updated_at and the attributes that are not
+                columns of cls are ignored; updated_at is set to the
+                current time. Values are set as by setattr, so that e.g.
+                a User password is hashed.
+        Returns:
+            the number of objects updated.
+        """
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            return 0
+        columns = cls.__table__.columns
+        # values go through the __setattr__ of cls on a bare instance
+        scratch = sqlalchemy.inspect(cls).class_manager.new_instance()
+        ids = list(updates)
+        found = set()
+        for i in range(0, len(ids), 500):
+            found.update(id for id, in self.__session.query(cls.id).filter(
+                cls.id.in_(ids[i:i + 500])))
+        now = datetime.utcnow()
+        rows = []
+        for id in ids:
+            if id not in found:
+                continue
+            row = {}
+            for key, value in updates[id].items():
+                if key in columns and key not in ("id", "created_at",
+                                                  "updated_at"):
+                    setattr(scratch, key, value)
+                    row[key] = getattr(scratch, key)
+            row["id"] = id
+            row["updated_at"] = now
+            rows.append(row)
+        if not rows:
+            return 0
+        # one executemany UPDATE ... WHERE id = ? per set of columns
+        self.__session.execute(update(cls), rows)
+        self.__bump([cls.__name__])
+        try:
+            self.save()
+        finally:
+            for row in rows:
+                self.__cache.invalidate(cls.__name__, row["id"])
+        # keep the objects already loaded in the session up to date
+        for row in rows:
+            obj = self.__session.identity_map.get(identity_key(cls, row["id"]))
+            if obj is not None:
+                for key, value in row.items():
+                    set_committed_value(obj, key, value)
+        return len(rows)
+
+    def delete_many(self, objs):
+        """deletes every object of objs and commits in one transaction"""
+        for obj in objs:
+            self.__session.delete(obj)
+        self.save()
 
     def save(self):
-        """commit all changes of the current database session"""
-        self.__session.commit()
+        """commit all changes of the current database session
+
+        Within a batch (see begin()), the changes are only flushed.
+        """
+        session = self.__session
+        changed = [(type(obj).__name__, obj.id) for obj in
+                   list(session.new) + list(session.dirty) +
+                   list(session.deleted)]
+        batch = session.info.get("batch")
+        if batch is not None:
+            session.flush()
+            self.__bump(name for name, id in changed)
+            batch.extend(changed)
+            return
+        try:
+            session.flush()
+            self.__bump(name for name, id in changed)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            # after the commit, so that a read of the old rows running
+            # concurrently cannot be cached again
+            for name, id in changed:
+                self.__cache.invalidate(name, id)
+
+    def begin(self):
+        """starts a batch: until commit() or rollback(), save() sends the
+        changes of this thread's session without committing them
+
+        Raises RuntimeError if this thread's batch is already started.
+        """
+        if "batch" in self.__session.info:
+            raise RuntimeError("a batch is already started")
+        self.__session.info["batch"] = []
+
+    def commit(self):
+        """ends the batch started by begin() and commits it at once"""
+        changed = self.__session.info.pop("batch", [])
+        try:
+            self.save()
+        finally:
+            for name, id in changed:
+                self.__cache.invalidate(name, id)
+
+    def rollback(self):
+        """ends the batch started by begin() and discards its changes"""
+        changed = self.__session.info.pop("batch", [])
+        try:
+            self.__session.rollback()
+        finally:
+            for name, id in changed:
+                self.__cache.invalidate(name, id)
 
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
         if obj is not None:
             self.__session.delete(obj)
+            self.__cache.invalidate(type(obj).__name__, obj.id)
 
     def reload(self):
         """reloads data from the database"""
         Base.metadata.create_all(self.__engine)
+        try:
+            with self.__engine.begin() as conn:
+                found = {name for name, in conn.execute(
+                    select(versions.c.name))}
+                missing = [{"name": name, "version": 0}
+                           for name in classes if name not in found]
+                if missing:
+                    conn.execute(insert(versions), missing)
+        except sqlalchemy.exc.IntegrityError:
+            # seeded by another process meanwhile
+            pass
         sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
         Session = scoped_session(sess_factory)
         self.__session = Session
@@ -75,26 +548,122 @@ class DBStorage:
         """call remove() method on the private session attribute"""
         self.__session.remove()
 
-    def get(self, cls, id):
+    def get(self, cls, id, load=None):
         """Retrieves one object.
 
         Args:
             cls (BaseModel): the class.
             id (string): the object ID.
+            load (list, optional): relationship paths to load with it.
         Returns:
             the object based on the class and its ID, or None if not found.
         """
-        obj = None
-        try:
-            if type(cls) is str:
-                cls = eval(cls)
-            if cls in classes.values() and id and type(id) is str:
-                objs = self.__session.query(cls).filter(cls.id == (id,))
-                obj = objs[0]
-        except Exception:
-            pass
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in classes.values() or not id or type(id) is not str:
+            return None
+        if load:
+            return self.__session.get(cls, id,
+                                      options=self.__load(cls, load))
+        obj = self.__cached(cls, id)
+        if obj is None:
+            version = self.__cache.version(cls.__name__)
+            obj = self.__session.get(cls, id)
+            self.__keep(obj, version)
         return obj
 
+    def __cached(self, cls, id):
+        """returns cls.id from the session or the read cache, or None"""
+        obj = self.__session.identity_map.get(identity_key(cls, id))
+        if obj is not None:
+            # columns left unloaded by page(fields=...) are read back
+            state = sqlalchemy.inspect(obj)
+            unloaded = [attr.key for attr in state.mapper.column_attrs
+                        if attr.key in state.unloaded]
+            if unloaded:
+                self.__session.refresh(obj, unloaded)
+            return obj
+        snapshot = self.__cache.get((cls.__name__, id))
+        if snapshot is None:
+            return None
+        # attaches a copy to the session without a SELECT
+        return self.__session.merge(snapshot, load=False)
+
+    def __keep(self, obj, version):
+        """caches a detached snapshot of the columns of a loaded object"""
+        if obj is None or self.__cache.size <= 0:
+            return
+        state = sqlalchemy.inspect(obj)
+        if not state.persistent or state.modified:
+            return
+        mapper = state.mapper
+        snapshot = mapper.class_manager.new_instance()
+        for attr in mapper.column_attrs:
+            set_committed_value(snapshot, attr.key, getattr(obj, attr.key))
+        make_transient_to_detached(snapshot)
+        self.__cache.put((type(obj).__name__, obj.id), snapshot, version)
+
+    def get_many(self, cls, ids):
+        """Retrieves several objects of one class.
+
+        Args:
+            cls (BaseModel): the class.
+            ids (list): the object IDs.
+        Returns:
+            the list of objects found, in the order of ids, fetched with
+                one IN query per 500 IDs.
+        """
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            return []
+        ids = [id for id in ids if id and type(id) is str]
+        found = {}
+        missing = []
+        for id in ids:
+            obj = self.__cached(cls, id)
+            if obj is None:
+                missing.append(id)
+            else:
+                found[id] = obj
+        version = self.__cache.version(cls.__name__)
+        for i in range(0, len(missing), 500):
+            query = self.__session.query(cls).filter(
+                cls.id.in_(missing[i:i + 500]))
+            for obj in query:
+                found[obj.id] = obj
+                self.__keep(obj, version)
+        return [found[id] for id in ids if id in found]
+
+    def related(self, cls, attr, value):
+        """Retrieves the objects of a class that reference another object.
+
+        Args:
+            cls (BaseModel): the class.
+            attr (string): a foreign key of cls, e.g. "state_id".
+            value (string): the ID of the referenced object.
+        Returns:
+            the list of cls objects whose attr is value. The list of
+                their IDs is kept in the read cache.
+        """
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in classes.values() or \
+                attr not in cls.__table__.columns:
+            return []
+        key = ("related", cls.__name__, attr, value,
+               self.__cache.version(cls.__name__))
+        ids = self.__cache.get(key)
+        if ids is None:
+            version = key[-1]
+            objs = self.__session.query(cls).filter(
+                getattr(cls, attr) == value).all()
+            for obj in objs:
+                self.__keep(obj, version)
+            self.__cache.put(key, [obj.id for obj in objs])
+            return objs
+        return self.get_many(cls, ids)
+
     def count(self, cls=None):
         """Ccounts the number of objects in storage.
 
@@ -105,13 +674,95 @@ class DBStorage:
                 If no class is passed, returns the count of all
                 objects in storage.
         """
-        count = 0
-        if cls:
-            if type(cls) is str:
-                cls = eval(cls)
+        if cls is None:
+            return sum(self.counts().values())
+        if type(cls) is str:
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            return 0
+        key = ("count", cls.__name__, self.__cache.version(cls.__name__))
+        count = self.__cache.get(key)
+        if count is None:
             count = self.__session.query(cls).count()
-        else:
-            clss = classes.values()
-            for cl in clss:
-                count = count + self.__session.query(cl).count()
-        return (count)
+            self.__cache.put(key, count)
+        return count
+
+    def counts(self):
+        """Counts the objects of every class at once.
+
+        Returns:
+            a dictionary of the number of objects in storage by class
+                name, read with a single UNION ALL of COUNT(*) queries.
+        """
+        key = ("counts",) + tuple(self.__cache.version(name)
+                                  for name in classes)
+        counts = self.__cache.get(key)
+        if counts is not None:
+            return dict(counts)
+        query = union_all(*(select(literal(name).label("name"),
+                                   func.count().label("count"))
+                            .select_from(cls.__table__)
+                            for name, cls in classes.items()))
+        counts = {name: count for name, count in
+                  self.__session.execute(query)}
+        self.__cache.put(key, counts)
+        return dict(counts)
+
+    def places_search(self, states=None, cities=None, amenities=None):
+        """Retrieves the places of some states and cities with amenities.
+
+        Args:
+            states (list, optional): State IDs.
+            cities (list, optional): City IDs; the places of the cities of
+                states and of cities are searched.
+            amenities (list, optional): Amenity IDs the places must all
+                have.
+        Returns:
+            the list of places, in ID order. Without states and cities,
+                every place is searched. Places with the amenities are
+                read from the place_amenity index, by intersecting the
+                places of each amenity from the one with the fewest.
+        """
+        session = self.__session
+        place_amenity = Base.metadata.tables["place_amenity"]
+        city_ids = set(cities or [])
+        states = list(set(states or []))
+        for i in range(0, len(states), 500):
+            city_ids.update(id for id, in session.query(City.id).filter(
+                City.state_id.in_(states[i:i + 500])))
+        if not amenities:
+            query = session.query(Place).order_by(Place.id)
+            if not states and not cities:
+                return query.all()
+            city_ids = sorted(city_ids)
+            places = []
+            for i in range(0, len(city_ids), 500):
+                places += query.filter(
+                    Place.city_id.in_(city_ids[i:i + 500])).all()
+            return sorted(places, key=lambda place: place.id)
+        amenities = list(set(amenities))
+        sizes = {}
+        for i in range(0, len(amenities), 500):
+            sizes.update(session.query(
+                place_amenity.c.amenity_id, func.count()).filter(
+                    place_amenity.c.amenity_id.in_(amenities[i:i + 500]))
+                .group_by(place_amenity.c.amenity_id))
+        if len(sizes) < len(amenities):
+            return []
+        amenities.sort(key=sizes.get)
+        ids = [id for id, in session.query(place_amenity.c.place_id).filter(
+            place_amenity.c.amenity_id == amenities[0])]
+        for amenity_id in amenities[1:]:
+            found = []
+            for i in range(0, len(ids), 500):
+                found += [id for id, in session.query(
+                    place_amenity.c.place_id).filter(
+                        place_amenity.c.amenity_id == amenity_id,
+                        place_amenity.c.place_id.in_(ids[i:i + 500]))]
+            ids = found
+            if not ids:
+                return []
+        places = self.get_many(Place, sorted(ids))
+        if states or cities:
+            places = [place for place in places if place.city_id in city_ids]
+        return places
@@ -3,94 +3,899 @@
 Contains the FileStorage class
 """
 
+from datetime import datetime
 import json
 from models.amenity import Amenity
-from models.base_model import BaseModel
+from models.base_model import BaseModel, time
 from models.city import City
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+import atexit
+from bisect import bisect_right, insort
+from models.engine.pagination import decode_cursor, encode_cursor
+from os import getenv
+import os
+import sys
+import threading
+from time import sleep
+import uuid
 
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
 
+class Lazy:
+    """Mixin of instances that keep their JSON dictionary until touched
+
+    reload() builds instances of a Lazy subclass of their model holding
+    only the dictionary read from the file. The first attribute access
+    fills __dict__ from it and turns the instance into its model class.
+    """
+    __hydrate_lock = threading.Lock()
+    __classes = {}
+
+    @classmethod
+    def new(cls, model, value):
+        """returns an unhydrated instance of model holding value"""
+        lazy_cls = cls.__classes.get(model)
+        if lazy_cls is None:
+            lazy_cls = type(model.__name__, (cls, model),
+                            {"_Lazy__model": model})
+            cls.__classes[model] = lazy_cls
+        obj = object.__new__(lazy_cls)
+        object.__getattribute__(obj, "__dict__")["__lazy__"] = value
+        return obj
+
+    @staticmethod
+    def raw(obj):
+        """returns the JSON dictionary of obj if it is still unhydrated"""
+        if isinstance(obj, Lazy):
+            return object.__getattribute__(obj, "__dict__").get("__lazy__")
+        return None
+
+    def __hydrate(self):
+        """fills __dict__ the way BaseModel.__init__ does with kwargs"""
+        with Lazy.__hydrate_lock:
+            model = type(self).__dict__.get("_Lazy__model")
+            if model is None:
+                return
+            attrs = object.__getattribute__(self, "__dict__")
+            value = attrs.pop("__lazy__")
+            for key in value:
+                if key != "__class__":
+                    attrs[key] = value[key]
+            for key in ("created_at", "updated_at"):
+                if type(attrs.get(key)) is str:
+                    attrs[key] = datetime.strptime(attrs[key], time)
+                else:
+                    attrs[key] = datetime.utcnow()
+            if attrs.get("id") is None:
+                attrs["id"] = str(uuid.uuid4())
+            object.__setattr__(self, "__class__", model)
+
+    def __getattribute__(self, name):
+        """hydrates the instance before its first attribute access"""
+        Lazy.__hydrate(self)
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        """hydrates the instance before its first attribute change"""
+        Lazy.__hydrate(self)
+        setattr(self, name, value)
+
+    def __delattr__(self, name):
+        """hydrates the instance before its first attribute deletion"""
+        Lazy.__hydrate(self)
+        delattr(self, name)
+
+
 class FileStorage:
-    """serializes instances to a JSON file & deserializes back to instances"""
+    """serializes instances to a JSON file & deserializes back to instances
+
+    Writers (new, delete, attribute changes, save, reload) are serialized
+    by __lock. Readers never take it: the dictionaries returned by all()
+    are never changed afterwards, a writer replaces a dictionary that was
+    handed out by a copy before changing it (copy-on-write).
+    """
 
     # string - path to the JSON file
     __file_path = "file.json"
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # dictionary - the same objects partitioned by <class name>
+    __classes = {name: {} for name in classes}
+    # boolean - append changes to <__file_path>.log instead of rewriting
+    __journal = getenv("HBNB_FILE_JOURNAL") == "1"
+    # int - number of journal records that triggers a compaction
+    __journal_limit = int(getenv("HBNB_FILE_JOURNAL_LIMIT", "1000"))
+    # int - number of records currently in the journal
+    __journal_size = 0
+    # dictionary - changes not yet journaled, <class name>.id: obj or None
+    __pending = {}
+    # dictionary - "<key>": <JSON> text of objects unchanged since encoded
+    __fragments = {}
+    # dictionary - updated_at of every object as last read from/written to
+    # the JSON file, by <class name>.id
+    __synced = {}
+    # tuple - (mtime, size, inode) of the files at the last read or write
+    __stamp = None
+    __compacting = False
+    # lock - serializes writers
+    __lock = threading.RLock()
+    # set - dictionaries handed out by all(), by class name (None: __objects)
+    __shared = set()
+    # lock - held while changing an index that readers may be reading
+    __share_lock = threading.Lock()
+    # float - seconds the background flusher waits to group saves together,
+    # 0 (the default) writes in the calling thread
+    __flush_window = float(getenv("HBNB_FILE_FLUSH_WINDOW", "0")) / 1000
+    __flusher = None
+    __flush_cond = threading.Condition()
+    # int - number of the last save() requested and of the last one written
+    __requested = 0
+    __flushed = 0
+    # int - number of writes done by the flusher
+    __flushes = 0
+    # list - (first ticket, last ticket, error) of each failed write that a
+    # save() still waiting for one of its tickets has to raise
+    __flush_errors = []
+    # list - tickets of the save() calls waiting for the flusher
+    __waiting = []
+    # int - reads of the files by __sync before it gives up on a snapshot
+    # and journal that do not change while they are read
+    __sync_attempts = 3
+    # dictionary - attributes of each class that reference another object
+    __foreign_keys = {"Amenity": ("place_id",), "City": ("state_id",),
+                      "Place": ("city_id", "user_id"),
+                      "Review": ("place_id", "user_id")}
+    # dictionary - (<class name>, <attribute>): {value: {<key>: obj}}
+    __links = {}
+    # dictionary - the foreign key values each object is indexed under
+    __linked = {}
+    # dictionary - <class name>: {<attribute>: sorted [(value, id)]}, built
+    # by the first page() of the class sorted on the attribute
+    __sorted = {}
+    # dictionary - <class name>: {<attribute>: {<key>: (value, id)}}
+    __sort_keys = {}
+    # dictionary - <class name>: number of writes to its objects
+    __versions = {}
+    # threading.local - active is True in the thread that called begin()
+    __batch = threading.local()
+
+    def __class_name(self, cls):
+        """returns the registered class name of cls (class or string)"""
+        if type(cls) is not str:
+            cls = getattr(cls, "__name__", None)
+        if cls in classes:
+            return cls
+        return None
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
+    def all(self, cls=None, load=None):
+        """returns the dictionary __objects, or the bucket of one class
+
+        load is accepted for parity with DBStorage and ignored: the
+        relationship properties already read from the foreign key indexes.
+        """
+        name = None
         if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
-        return self.__objects
+            name = self.__class_name(cls)
+            if name is None:
+                return {}
+        with self.__share_lock:
+            self.__shared.add(name)
+            if name is None:
+                return self.__objects
+            return self.__classes[name]
+
+    def stream(self, cls=None, filters=None, fields=None):
+        """yields the objects of all(cls) one at a time
+
+        With filters, only the objects whose attributes have the given
+        values; a filter on a foreign key reads its index. fields is
+        accepted for parity with DBStorage and ignored.
+        """
+        if not filters:
+            for obj in self.all(cls).values():
+                yield obj
+            return
+        name = self.__class_name(cls)
+        linked = [attr for attr in self.__foreign_keys.get(name, ())
+                  if attr in filters]
+        if linked:
+            objs = self.related(name, linked[0], filters[linked[0]])
+        else:
+            objs = self.all(cls).values()
+        for obj in objs:
+            if all(self.__value(obj, attr) == value
+                   for attr, value in filters.items()):
+                yield obj
+
+    def __writable(self, name):
+        """returns the dictionary of a class (None: __objects) to change
+
+        It is copied first if all() handed it out. Must be called with
+        __share_lock held.
+        """
+        if name is None:
+            if name in self.__shared:
+                self.__shared.discard(name)
+                FileStorage.__objects = dict(self.__objects)
+            return self.__objects
+        if name in self.__shared:
+            self.__shared.discard(name)
+            self.__classes[name] = dict(self.__classes[name])
+        return self.__classes.setdefault(name, {})
 
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
             key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
-
-    def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
-        for key in self.__objects:
-            if key == "password":
-                json_objects[key].decode()
-            json_objects[key] = self.__objects[key].to_dict(safe_pass=False)
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+            with self.__lock:
+                self.__store(key, obj)
+                self.__pending[key] = obj
 
-    def reload(self):
-        """deserializes the JSON file to __objects"""
+    def new_many(self, objs):
+        """adds every object of objs and saves them with one write"""
+        with self.__lock:
+            for obj in objs:
+                key = obj.__class__.__name__ + "." + obj.id
+                self.__store(key, obj)
+                self.__pending[key] = obj
+        self.save()
+
+    def update_many(self, cls, updates):
+        """Updates several objects of one class and saves them at once.
+
+        Args:
+            cls (BaseModel): the class.
+            updates (dict): the attributes to set, by object ID. id,
+                created_at and updated_at are ignored; updated_at is set
+                to the current time.
+        Returns:
+            the number of objects updated.
+        """
+        count = 0
+        now = datetime.utcnow()
+        with self.__lock:
+            for id, changes in updates.items():
+                obj = self.get(cls, id)
+                if obj is None:
+                    continue
+                for key, value in changes.items():
+                    if key not in ("id", "created_at", "updated_at",
+                                   "__class__"):
+                        setattr(obj, key, value)
+                obj.updated_at = now
+                count += 1
+        self.save()
+        return count
+
+    def delete_many(self, objs):
+        """deletes every object of objs and saves with one write"""
+        with self.__lock:
+            for obj in objs:
+                key = obj.__class__.__name__ + '.' + obj.id
+                self.__drop(key)
+                self.__pending[key] = None
+        self.save()
+
+    def __store(self, key, obj):
+        """stores obj at key in __objects and in every index"""
+        with self.__share_lock:
+            self.__writable(None)[key] = obj
+            self.__writable(type(obj).__name__)[key] = obj
+        self.__fragments.pop(key, None)
+        self.__link(key, obj)
+        self.__resort(key, obj)
+        self.__touch(key)
+
+    def __touch(self, key):
+        """counts a write to the class of the object stored at key"""
+        name = key.split(".")[0]
+        self.__versions[name] = self.__versions.get(name, 0) + 1
+
+    def version(self, cls):
+        """Returns the version of the objects of a class.
+
+        Args:
+            cls (BaseModel): the class.
+        Returns:
+            a number that changes whenever an object of cls is stored,
+                changed or deleted.
+        """
+        return self.__versions.get(self.__class_name(cls), 0)
+
+    def __link(self, key, obj):
+        """indexes obj under the current values of its foreign keys"""
+        name = type(obj).__name__
+        attrs = self.__foreign_keys.get(name)
+        if attrs is None:
+            return
+        self.__unlink(key)
+        attrs_dict = Lazy.raw(obj)
+        if attrs_dict is None:
+            attrs_dict = obj.__dict__
+        values = tuple(attrs_dict.get(attr) for attr in attrs)
+        with self.__share_lock:
+            for attr, value in zip(attrs, values):
+                links = self.__links.setdefault((name, attr), {})
+                links.setdefault(value, {})[key] = obj
+        self.__linked[key] = values
+
+    def __unlink(self, key):
+        """removes the object stored at key from the foreign key indexes"""
+        values = self.__linked.pop(key, None)
+        if values is None:
+            return
+        name = key.split(".")[0]
+        with self.__share_lock:
+            for attr, value in zip(self.__foreign_keys[name], values):
+                links = self.__links[(name, attr)]
+                links[value].pop(key, None)
+                if not links[value]:
+                    del links[value]
+
+    def related(self, cls, attr, value):
+        """Retrieves the objects of a class that reference another object.
+
+        Args:
+            cls (BaseModel): the class.
+            attr (string): a foreign key of cls, e.g. "state_id".
+            value (string): the ID of the referenced object.
+        Returns:
+            the list of cls objects whose attr is value.
+        """
+        links = self.__links.get((self.__class_name(cls), attr), {})
+        with self.__share_lock:
+            return list(links.get(value, {}).values())
+
+    def __value(self, obj, attr):
+        """returns the value of attr in obj, without hydrating it
+
+        Datetimes are returned in the format of the JSON file, which sorts
+        like them.
+        """
+        attrs_dict = Lazy.raw(obj)
+        if attrs_dict is None:
+            attrs_dict = obj.__dict__
+        value = attrs_dict.get(attr, getattr(type(obj), attr, None))
+        if isinstance(value, datetime):
+            value = value.strftime(time)
+        return value
+
+    def __sort_key(self, obj, attr):
+        """returns the (value, id) key of obj in the index sorted on attr"""
+        value = self.__value(obj, attr)
+        return ("" if value is None else value, self.__value(obj, "id"))
+
+    def __resort(self, key, obj):
+        """moves obj (None: removes it) in the sorted indexes of its class"""
+        name = key.split(".")[0]
+        indexes = self.__sorted.get(name)
+        if not indexes:
+            return
+        with self.__share_lock:
+            for attr, entries in indexes.items():
+                keys = self.__sort_keys[name][attr]
+                old = keys.pop(key, None)
+                if old is not None:
+                    entries.pop(bisect_right(entries, old) - 1)
+                if obj is not None:
+                    keys[key] = self.__sort_key(obj, attr)
+                    insort(entries, keys[key])
+
+    def __sorted_index(self, name, attr):
+        """returns the [(value, id)] of a class sorted on attr"""
+        indexes = self.__sorted.get(name, {})
+        if attr in indexes:
+            return indexes[attr]
+        with self.__lock:
+            keys = {key: self.__sort_key(obj, attr)
+                    for key, obj in self.__classes.get(name, {}).items()}
+            self.__sort_keys.setdefault(name, {})[attr] = keys
+            entries = sorted(keys.values())
+            self.__sorted.setdefault(name, {})[attr] = entries
+            return entries
+
+    def page(self, cls, after=None, limit=100, order_by="created_at",
+             filters=None, fields=None):
+        """Retrieves one page of the objects of a class.
+
+        Args:
+            cls (BaseModel): the class.
+            after (string, optional): the cursor returned with the previous
+                page. Defaults to the first page.
+            limit (int, optional): the maximum number of objects.
+            order_by (string, optional): the attribute to sort by, the ID
+                breaks ties. Defaults to "created_at".
+            filters (dict, optional): attribute values the objects must
+                have.
+            fields (list, optional): ignored, as in stream().
+        Returns:
+            the list of objects and the cursor of the next page, or None
+                after the last page. Objects are read from an index of the
+                class sorted on (order_by, id), kept up to date by every
+                write, starting after the cursor, so a cursor stays valid
+                whatever is inserted meanwhile.
+        Raises:
+            ValueError: if cls, order_by, a filter or after is invalid.
+        """
+        name = self.__class_name(cls)
+        if name is None:
+            raise ValueError("invalid class")
+        filters = filters or {}
+        for attr in [order_by] + list(filters):
+            if attr not in ("id", "created_at", "updated_at") and \
+                    not hasattr(classes[name], attr):
+                raise ValueError("{} has no attribute {}".format(name, attr))
+        start = decode_cursor(after) if after else None
+        linked = [attr for attr in self.__foreign_keys.get(name, ())
+                  if attr in filters]
+        if linked:
+            # the objects referencing one object are few: sort them
+            entries = sorted(self.__sort_key(obj, order_by) for obj in
+                             self.related(name, linked[0],
+                                          filters[linked[0]]))
+        else:
+            entries = self.__sorted_index(name, order_by)
+        objs = []
+        with self.__share_lock:
+            try:
+                i = bisect_right(entries, tuple(start)) if start else 0
+            except TypeError:
+                raise ValueError("invalid cursor")
+            while i < len(entries) and len(objs) <= limit:
+                obj = self.__objects.get(name + "." + entries[i][1])
+                i += 1
+                if obj is not None and all(
+                        self.__value(obj, attr) == value
+                        for attr, value in filters.items()):
+                    objs.append(obj)
+        if len(objs) <= limit:
+            return objs, None
+        objs = objs[:limit]
+        return objs, encode_cursor(*self.__sort_key(objs[-1], order_by))
+
+    def mark_dirty(self, obj):
+        """drops the cached JSON of obj after one of its attributes changed"""
+        id = obj.__dict__.get("id")
+        if type(id) is not str:
+            return
+        key = obj.__class__.__name__ + "." + id
+        if self.__objects.get(key) is not obj:
+            return
+        with self.__lock:
+            self.__fragments.pop(key, None)
+            self.__pending[key] = obj
+            self.__link(key, obj)
+            self.__resort(key, obj)
+            self.__touch(key)
+
+    def __fragment(self, key, obj):
+        """returns the "<key>": <JSON> text of obj, encoding it if changed"""
+        fragment = self.__fragments.get(key)
+        if fragment is None:
+            value = Lazy.raw(obj)
+            if value is None:
+                value = obj.to_dict(safe_pass=False)
+            fragment = json.dumps(key) + ": " + json.dumps(value)
+            self.__fragments[key] = fragment
+            self.__synced[key] = value.get("updated_at")
+        return fragment
+
+    def save(self, wait=True):
+        """serializes __objects to the JSON file (path: __file_path)
+
+        With HBNB_FILE_FLUSH_WINDOW (milliseconds) set, the write is left
+        to a background flusher that writes every save() requested within
+        the window at once. wait=False returns without waiting for it.
+        Within a batch (see begin()), nothing is written.
+        """
+        if getattr(self.__batch, "active", False):
+            return
+        if not self.__flush_window:
+            self.__flush()
+            return
+        with self.__flush_cond:
+            FileStorage.__requested += 1
+            ticket = self.__requested
+            if self.__flusher is None:
+                FileStorage.__flusher = threading.Thread(
+                    target=self.__run_flusher, daemon=True)
+                self.__flusher.start()
+                atexit.register(self.__drain)
+            self.__flush_cond.notify_all()
+            if not wait:
+                return
+            self.__waiting.append(ticket)
+            try:
+                while self.__flushed < ticket:
+                    self.__flush_cond.wait()
+            finally:
+                self.__waiting.remove(ticket)
+            for first, last, error in self.__flush_errors:
+                if first <= ticket <= last:
+                    raise error
+
+    def begin(self):
+        """starts a batch: until commit() or rollback(), save() writes
+        nothing and the other threads wait to change or write objects
+
+        Raises RuntimeError if this thread's batch is already started.
+        """
+        if getattr(self.__batch, "active", False):
+            raise RuntimeError("a batch is already started")
+        self.__lock.acquire()
+        if self.__pending:
+            # saves of other threads still waiting for the flusher: a
+            # rollback() must not discard them
+            self.__flush()
+        self.__batch.active = True
+
+    def commit(self):
+        """ends the batch started by begin() and saves it with one write"""
+        self.__batch.active = False
+        self.__lock.release()
+        self.save()
+
+    def rollback(self):
+        """ends the batch started by begin() and reads back from the JSON
+        file (and journal) every object changed since it was written"""
+        try:
+            if self.__pending:
+                self.__restore(set(self.__pending))
+        finally:
+            self.__batch.active = False
+            self.__lock.release()
+
+    def __restore(self, keys):
+        """replaces the objects at keys by their last written version"""
+        found = {}
         try:
             with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
+                for key, value in self.__stream(f):
+                    if key in keys:
+                        found[key] = value
         except Exception:
             pass
+        if self.__journal:
+            for path in (self.__file_path + ".log.old",
+                         self.__file_path + ".log"):
+                for key, value in self.__read_journal(path):
+                    if key in keys:
+                        found[key] = value
+        for key in keys:
+            self.__pending.pop(key, None)
+            value = found.get(key)
+            if value is None:
+                self.__drop(key)
+            else:
+                self.__load(key, value)
+                self.__synced[key] = value.get("updated_at")
+
+    def __run_flusher(self):
+        """writes the saves requested within each flush window at once"""
+        while True:
+            with self.__flush_cond:
+                while self.__requested == self.__flushed:
+                    self.__flush_cond.wait()
+            sleep(self.__flush_window)
+            with self.__flush_cond:
+                first, ticket = self.__flushed + 1, self.__requested
+            try:
+                self.__flush()
+                error = None
+            except Exception as e:
+                error = e
+            with self.__flush_cond:
+                # the errors of tickets that no save() waits for any more
+                oldest = min(self.__waiting, default=first)
+                FileStorage.__flush_errors = [
+                    entry for entry in self.__flush_errors
+                    if entry[1] >= oldest]
+                if error is not None:
+                    self.__flush_errors.append((first, ticket, error))
+                FileStorage.__flushed = ticket
+                FileStorage.__flushes += 1
+                self.__flush_cond.notify_all()
+
+    def __drain(self):
+        """waits for the flusher to write the saves requested so far"""
+        with self.__flush_cond:
+            ticket = self.__requested
+            while self.__flushed < ticket:
+                self.__flush_cond.wait()
+
+    def __flush(self):
+        """writes __objects (or the journal) to disk"""
+        with self.__lock:
+            if self.__journal:
+                self.__append_journal()
+                return
+            json_objects = []
+            for key, obj in self.__objects.items():
+                json_objects.append(self.__fragment(key, obj))
+            self.__write(self.__file_path,
+                         "{" + ", ".join(json_objects) + "}")
+            self.__pending.clear()
+            FileStorage.__stamp = self.__file_stamp()
+
+    def __write(self, path, text):
+        """replaces path by text atomically: temp file, fsync, rename"""
+        os.replace(self.__write_temp(path, text), path)
+
+    def __write_temp(self, path, text):
+        """writes text to <path>.tmp, fsyncs it and returns its path"""
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp
+
+    def reload(self):
+        """deserializes the JSON file to __objects"""
+        with self.__lock:
+            self.__sync(False)
+
+    def __file_stamp(self):
+        """returns the (mtime, size, inode) of the JSON file and journal"""
+        paths = [self.__file_path]
+        if self.__journal:
+            paths += [self.__file_path + ".log.old", self.__file_path + ".log"]
+        stamp = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def __sync(self, changed_only):
+        """reads the JSON file (and journal) into __objects
+
+        With changed_only, objects whose updated_at matches the one last
+        read or written are kept as they are, and objects that are no
+        longer in the file are removed. The files are read again, up to
+        __sync_attempts times, if they changed meanwhile: another process
+        may have compacted the journal into the snapshot after it was
+        opened, and the objects of that journal must not be taken for
+        removed. Nothing is removed if they kept changing.
+        """
+        for attempt in range(self.__sync_attempts):
+            stamp = self.__file_stamp()
+            seen = {}
+            try:
+                with open(self.__file_path, 'r') as f:
+                    for key, value in self.__stream(f):
+                        self.__apply(key, value, seen, changed_only)
+            except Exception:
+                pass
+            if self.__journal:
+                FileStorage.__journal_size = 0
+                for path in (self.__file_path + ".log.old",
+                             self.__file_path + ".log"):
+                    for key, value in self.__read_journal(path):
+                        self.__apply(key, value, seen, changed_only)
+                        FileStorage.__journal_size += 1
+            consistent = self.__file_stamp() == stamp
+            if consistent:
+                break
+        if not consistent:
+            # the next close() reads the files again
+            FileStorage.__synced = {**self.__synced, **seen}
+            FileStorage.__stamp = stamp
+            return
+        if changed_only:
+            for key in self.__synced.keys() - seen.keys():
+                self.__drop(key)
+        FileStorage.__synced = seen
+        FileStorage.__stamp = stamp
+
+    def __stream(self, f):
+        """yields the items of the JSON object in f, one at a time
+
+        Only one item and a 64 KiB read buffer are held in memory, instead
+        of the whole file and every parsed dictionary with json.load.
+        """
+        decode = json.JSONDecoder().raw_decode
+        buf = ""
+        pos = 0
+        item = None
+        while True:
+            try:
+                while buf[pos] in " \t\r\n":
+                    pos += 1
+                if item is None and buf[pos] == "{":
+                    item = []
+                    pos += 1
+                    continue
+                if buf[pos] in ":,":
+                    pos += 1
+                    continue
+                if buf[pos] == "}" or item is None:
+                    return
+                value, pos = decode(buf, pos)
+            except (IndexError, ValueError):
+                more = f.read(65536)
+                if not more:
+                    return
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            if type(value) is dict:
+                # raw_decode does not share key strings between calls
+                value = {sys.intern(k): v for k, v in value.items()}
+            item.append(value)
+            if len(item) == 2:
+                yield item[0], item[1]
+                item = []
+
+    def __apply(self, key, value, seen, changed_only):
+        """applies one record of the JSON file or journal to __objects"""
+        if value is None:
+            self.__drop(key)
+            seen.pop(key, None)
+            return
+        seen[key] = value.get("updated_at")
+        if (changed_only and key in self.__objects and
+                self.__synced.get(key) == seen[key]):
+            return
+        self.__load(key, value)
+
+    def __load(self, key, value):
+        """builds an instance from its dictionary and stores it at key"""
+        name = value["__class__"]
+        self.__store(key, Lazy.new(classes[name], value))
+
+    def __drop(self, key):
+        """removes the object stored at key, if any"""
+        with self.__share_lock:
+            if key in self.__objects:
+                self.__writable(None).pop(key)
+            name = key.split(".")[0]
+            if key in self.__classes.get(name, {}):
+                self.__writable(name).pop(key)
+        self.__fragments.pop(key, None)
+        self.__synced.pop(key, None)
+        self.__unlink(key)
+        self.__resort(key, None)
+        self.__touch(key)
 
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
             key = obj.__class__.__name__ + '.' + obj.id
-            if key in self.__objects:
-                del self.__objects[key]
+            with self.__lock:
+                self.__drop(key)
+                self.__pending[key] = None
+
+    def __read_journal(self, path):
+        """yields the (key, dictionary or None) records of a journal file"""
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        (key, value), = json.loads(line).items()
+                    except ValueError:
+                        # torn write at the tail of the journal
+                        continue
+                    yield key, value
+        except FileNotFoundError:
+            return
+
+    def __append_journal(self):
+        """appends the pending changes to the journal as one record each
+
+        The changes stay pending until the records are on disk, so that
+        the next save() writes them again if this one failed.
+        """
+        with self.__lock:
+            if not self.__pending:
+                return
+            lines = []
+            for key, obj in self.__pending.items():
+                if obj is None:
+                    lines.append("{" + json.dumps(key) + ": null}")
+                else:
+                    lines.append("{" + self.__fragment(key, obj) + "}")
+            fresh = self.__file_stamp() == self.__stamp
+            with open(self.__file_path + ".log", 'a') as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.__pending.clear()
+            if fresh:
+                FileStorage.__stamp = self.__file_stamp()
+            FileStorage.__journal_size += len(lines)
+            compact = (FileStorage.__journal_size >= self.__journal_limit and
+                       not self.__compacting)
+        if compact:
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        """folds the journal back into the JSON snapshot (__file_path)
+
+        The live journal is first renamed to <__file_path>.log.old so that
+        writers can keep appending while the snapshot is rebuilt. Journal
+        records are whole objects or deletions, so replaying .log.old over
+        a snapshot it was already folded into is harmless after a crash.
+        """
+        log = self.__file_path + ".log"
+        old = log + ".old"
+        with self.__lock:
+            if self.__compacting:
+                return
+            FileStorage.__compacting = True
+            fresh = self.__file_stamp() == self.__stamp
+            if not os.path.exists(old) and os.path.exists(log):
+                os.replace(log, old)
+                FileStorage.__journal_size = 0
+        try:
+            try:
+                with open(self.__file_path, 'r') as f:
+                    json_objects = json.load(f)
+            except FileNotFoundError:
+                json_objects = {}
+            for key, value in self.__read_journal(old):
+                if value is None:
+                    json_objects.pop(key, None)
+                else:
+                    json_objects[key] = value
+            tmp = self.__write_temp(self.__file_path,
+                                    json.dumps(json_objects))
+            # a close() of this process never sees the new snapshot next
+            # to the journal folded into it, nor the old one without it
+            with self.__lock:
+                os.replace(tmp, self.__file_path)
+                if os.path.exists(old):
+                    os.remove(old)
+        finally:
+            with self.__lock:
+                if fresh:
+                    FileStorage.__stamp = self.__file_stamp()
+                FileStorage.__compacting = False
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
-        self.reload()
+        """reloads the objects that changed in the JSON file, if it changed
 
-    def get(self, cls, id):
+        The file (and journal) is only read again when its mtime, size or
+        inode differ from the last time this process read or wrote it.
+        """
+        if self.__file_stamp() != self.__stamp:
+            with self.__lock:
+                if self.__file_stamp() != self.__stamp:
+                    self.__sync(True)
+
+    def get(self, cls, id, load=None):
         """Retrieves one object.
 
         Args:
             cls (BaseModel): the class.
             id (string): the object ID.
+            load (list, optional): ignored, as in all().
         Returns:
             the object based on the class and its ID, or None if not found.
         """
-        obj = None
-        try:
-            if type(cls) is str:
-                cls = eval(cls)
-            if cls in classes.values() and id and type(id) is str:
-                for key, value in self.__objects.items():
-                    if key.split(".")[1] == id:
-                        return value
-        except Exception:
-            pass
-        return obj
+        name = self.__class_name(cls)
+        if name is None or not id or type(id) is not str:
+            return None
+        return self.__objects.get(name + "." + id)
+
+    def get_many(self, cls, ids):
+        """Retrieves several objects of one class.
+
+        Args:
+            cls (BaseModel): the class.
+            ids (list): the object IDs.
+        Returns:
+            the list of objects found, in the order of ids.
+        """
+        objs = [self.get(cls, id) for id in ids]
+        return [obj for obj in objs if obj is not None]
 
     def count(self, cls=None):
         """Ccounts the number of objects in storage.
@@ -102,6 +907,64 @@ class FileStorage:
                 If no class is passed, returns the count of all
                 objects in storage.
         """
-        data = self.all(cls)
-        count = len(data)
+        if cls is None:
+            return len(self.__objects)
+        name = self.__class_name(cls)
+        count = len(self.__classes.get(name, {}))
         return (count)
+
+    def counts(self):
+        """Counts the objects of every class at once.
+
+        Returns:
+            a dictionary of the number of objects in storage by class
+                name, read from the sizes of the class buckets.
+        """
+        return {name: len(self.__classes.get(name, {})) for name in classes}
+
+    def places_search(self, states=None, cities=None, amenities=None):
+        """Retrieves the places of some states and cities with amenities.
+
+        Args:
+            states (list, optional): State IDs.
+            cities (list, optional): City IDs; the places of the cities of
+                states and of cities are searched.
+            amenities (list, optional): Amenity IDs the places must all
+                have.
+        Returns:
+            the list of places, in ID order. Without states and cities,
+                every place is searched. The foreign key indexes give the
+                cities of a state, the places of a city and the place of
+                an amenity; the places of each amenity are intersected
+                from the one with the fewest, without reading any object.
+        """
+        with self.__share_lock:
+            state_cities = self.__links.get(("City", "state_id"), {})
+            city_places = self.__links.get(("Place", "city_id"), {})
+            places = self.__classes["Place"]
+            city_ids = set(cities or [])
+            for id in states or []:
+                city_ids.update(key[len("City."):]
+                                for key in state_cities.get(id, {}))
+            if amenities:
+                postings = []
+                for id in set(amenities):
+                    place_id, = self.__linked.get("Amenity." + id, (None,))
+                    postings.append({"Place." + place_id} if place_id
+                                    else set())
+                postings.sort(key=len)
+                keys = postings[0]
+                for posting in postings[1:]:
+                    if not keys:
+                        break
+                    keys = keys & posting
+                keys = [key for key in keys if key in places]
+                if states or cities:
+                    keys = [key for key in keys
+                            if self.__linked[key][0] in city_ids]
+            elif states or cities:
+                keys = [key for id in city_ids
+                        for key in city_places.get(id, {})]
+            else:
+                keys = list(places)
+            return [places[key] for key in sorted(keys)]
@@ -0,0 +1,33 @@
+#!/usr/bin/python3
+"""
+Contains the cursor functions shared by the storage page() methods
+"""
+
+import base64
+from datetime import datetime
+import json
+from models.base_model import time
+
+
+def encode_cursor(value, id):
+    """returns the opaque cursor of the sort key (value, id)"""
+    if isinstance(value, datetime):
+        value = value.strftime(time)
+    raw = json.dumps([value, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """returns the sort key (value, id) of a cursor
+
+    Raises ValueError if cursor was not returned by encode_cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, id = json.loads(raw.decode())
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+    if type(id) is not str or \
+            type(value) not in (str, int, float, type(None)):
+        raise ValueError("invalid cursor")
+    return value, id
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""
+Contains the class SQLiteStorage
+"""
+
+from models.engine.db_storage import DBStorage
+from os import getenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+
+class SQLiteStorage(DBStorage):
+    """interacts with an embedded SQLite database
+
+    Selected with HBNB_TYPE_STORAGE=sqlite, it shares the SQLAlchemy
+    mapping and the all/new/save/delete/reload/close/get/count methods of
+    DBStorage. The database file is HBNB_SQLITE_DB (hbnb.db by default,
+    ":memory:" for a private in-memory database).
+    """
+
+    def __init__(self):
+        """Instantiate a SQLiteStorage object"""
+        HBNB_SQLITE_DB = getenv('HBNB_SQLITE_DB', 'hbnb.db')
+        # sqlite3 keeps this many prepared statements per connection
+        connect_args = {"check_same_thread": False,
+                        "cached_statements": 256}
+        if HBNB_SQLITE_DB == ":memory:":
+            engine = create_engine('sqlite://', connect_args=connect_args,
+                                   poolclass=StaticPool)
+        else:
+            engine = create_engine('sqlite:///{}'.format(HBNB_SQLITE_DB),
+                                   connect_args=connect_args)
+        event.listen(engine, "connect", self.__on_connect)
+        super().__init__(engine)
+
+    @staticmethod
+    def __on_connect(dbapi_connection, connection_record):
+        """configures every new SQLite connection"""
+        cursor = dbapi_connection.cursor()
+        # readers do not block the writer and the writer does not block
+        # readers; NORMAL only syncs at checkpoints in WAL mode
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
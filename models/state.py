@@ -13,7 +13,7 @@ class State(BaseModel, Base):
     """Representation of state """
     if models.storage_t == "db":
         __tablename__ = 'states'
-        name = Column(String(128), nullable=False)
+        name = Column(String(128), nullable=False, index=True)
         cities = relationship("City", backref="state")
     else:
         name = ""
@@ -26,9 +26,4 @@ class State(BaseModel, Base):
         @property
         def cities(self):
             """getter for list of city instances related to the state"""
-            city_list = []
-            all_cities = models.storage.all(City)
-            for city in all_cities.values():
-                if city.state_id == self.id:
-                    city_list.append(city)
-            return city_list
+            return models.storage.related(City, "state_id", self.id)
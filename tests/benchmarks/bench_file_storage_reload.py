@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""
+Benchmarks FileStorage.reload startup time and peak memory
+
+Usage: python3 -m tests.benchmarks.bench_file_storage_reload [size ...]
+
+For each dataset size a fixture file is written, then every mode is run
+in a fresh interpreter so that its peak RSS is measured on its own:
+"eager" is json.load followed by building every instance (the reload used
+before instances were hydrated lazily), "lazy" is FileStorage.reload.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+
+def write_fixture(path, size):
+    """writes size Place dictionaries to path, one at a time"""
+    with open(path, "w") as f:
+        f.write("{")
+        for i in range(size):
+            key = "Place." + str(uuid.uuid4())
+            value = {"__class__": "Place", "id": key[6:],
+                     "created_at": "2024-01-08T11:22:23.731615",
+                     "updated_at": "2024-01-08T11:22:23.731615",
+                     "name": "Place {}".format(i), "number_rooms": i,
+                     "city_id": str(uuid.uuid4()),
+                     "user_id": str(uuid.uuid4()),
+                     "description": "A place to stay " * 4}
+            if i:
+                f.write(", ")
+            f.write(json.dumps(key) + ": " + json.dumps(value))
+        f.write("}")
+
+
+def run(mode, path):
+    """reloads path with mode and prints seconds and peak RSS in MiB"""
+    from models.engine.file_storage import FileStorage, classes
+    start = time.perf_counter()
+    if mode == "eager":
+        objects = {}
+        with open(path, "r") as f:
+            jo = json.load(f)
+        for key in jo:
+            objects[key] = classes[jo[key]["__class__"]](**jo[key])
+        del jo
+    else:
+        FileStorage._FileStorage__file_path = path
+        FileStorage().reload()
+    elapsed = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print("{} {}".format(elapsed, rss))
+
+
+def main(sizes):
+    """prints a startup time and peak RSS table for every dataset size"""
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "fixture.json")
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    env.pop("HBNB_TYPE_STORAGE", None)
+    print("{:>10} {:>6} {:>10} {:>14}".format(
+        "objects", "mode", "time (s)", "peak RSS (MiB)"))
+    for size in sizes:
+        write_fixture(path, size)
+        for mode in ("eager", "lazy"):
+            out = subprocess.check_output(
+                [sys.executable, "-m", "tests.benchmarks." +
+                 "bench_file_storage_reload", "--run", mode, path],
+                cwd=workdir, env=env)
+            elapsed, rss = out.split()
+            print("{:>10} {:>6} {:>10.2f} {:>14.1f}".format(
+                size, mode, float(elapsed), float(rss)))
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], sys.argv[3])
+    else:
+        main([int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000])
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""
+Benchmarks FileStorage.save latency against the number of stored objects
+
+Usage: python3 -m tests.benchmarks.bench_file_storage_save [size ...]
+
+For each dataset size, "full" is a save that re-encodes every object (the
+cost of every save before serialized objects were cached) and "dirty" is a
+save after one attribute of a single object changed.
+"""
+
+import models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+import os
+import sys
+import tempfile
+import time
+
+
+def bench(size, rounds=5):
+    """returns the best full and dirty save latencies, in ms, for size"""
+    storage = FileStorage()
+    objects = FileStorage._FileStorage__objects
+    classes = FileStorage._FileStorage__classes
+    fragments = FileStorage._FileStorage__fragments
+    objects.clear()
+    for bucket in classes.values():
+        bucket.clear()
+    fragments.clear()
+    for i in range(size):
+        storage.new(Place(name="Place {}".format(i), number_rooms=i,
+                          description="A place to stay " * 4))
+    place = next(iter(objects.values()))
+    full = dirty = float("inf")
+    for i in range(rounds):
+        fragments.clear()
+        start = time.perf_counter()
+        storage.save()
+        full = min(full, time.perf_counter() - start)
+        place.number_rooms = i
+        start = time.perf_counter()
+        storage.save()
+        dirty = min(dirty, time.perf_counter() - start)
+    return full * 1000, dirty * 1000
+
+
+def main(sizes):
+    """prints a latency table for every dataset size"""
+    if models.storage_t == "db":
+        print("FileStorage benchmark: unset HBNB_TYPE_STORAGE")
+        return
+    path = os.path.join(tempfile.mkdtemp(), "file.json")
+    FileStorage._FileStorage__file_path = path
+    print("{:>10} {:>12} {:>12}".format("objects", "full (ms)", "dirty (ms)"))
+    for size in sizes:
+        full, dirty = bench(size)
+        print("{:>10} {:>12.2f} {:>12.2f}".format(size, full, dirty))
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1000, 10000, 100000])
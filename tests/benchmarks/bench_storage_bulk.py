@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""
+Benchmarks per-object against bulk ingestion in the configured storage
+
+Usage: python3 -m tests.benchmarks.bench_storage_bulk [size ...]
+
+For each dataset size, "save" creates the objects with one
+BaseModel.save() each (a file rewrite or a commit per object), "bulk"
+creates them with one storage.new_many() call, and "update" then renames
+every one of them with one storage.update_many() call. File mode writes
+to a temporary file; set HBNB_TYPE_STORAGE to measure a database.
+"""
+
+import models
+from models.engine.file_storage import FileStorage
+from models.state import State
+import os
+import sys
+import tempfile
+import time
+
+
+def bench(size):
+    """returns the save, bulk and update ingestion times, in s, for size"""
+    states = [State(name="State {}".format(i)) for i in range(size)]
+    start = time.perf_counter()
+    for st in states:
+        st.save()
+    per_object = time.perf_counter() - start
+    models.storage.delete_many(states)
+    states = [State(name="State {}".format(i)) for i in range(size)]
+    start = time.perf_counter()
+    models.storage.new_many(states)
+    bulk = time.perf_counter() - start
+    start = time.perf_counter()
+    models.storage.update_many(
+        State, {st.id: {"name": st.name + "!"} for st in states})
+    update = time.perf_counter() - start
+    models.storage.delete_many(states)
+    return per_object, bulk, update
+
+
+def main(sizes):
+    """prints an ingestion time table for every dataset size"""
+    path = None
+    if models.storage_t != "db":
+        path = os.path.join(tempfile.mkdtemp(), "file.json")
+        FileStorage._FileStorage__file_path = path
+    print("{:>10} {:>10} {:>10} {:>10}".format(
+        "objects", "save (s)", "bulk (s)", "update (s)"))
+    for size in sizes:
+        per_object, bulk, update = bench(size)
+        print("{:>10} {:>10.2f} {:>10.2f} {:>10.2f}".format(
+            size, per_object, bulk, update))
+    if path is not None:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [100, 1000, 5000])
@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+"""
+Contains the TestBatchDocs and TestBatch classes
+"""
+
+from api.v1.app import app
+from api.v1.views import batch
+import models
+from models.city import City
+from models.state import State
+import pep8
+import unittest
+from unittest import mock
+
+
+class TestBatchDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the batch endpoint"""
+    def test_pep8_conformance_batch(self):
+        """Test that api/v1/views/batch.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/batch.py',
+                                    'tests/test_api/test_batch.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_batch_docstrings(self):
+        """Test for the module and function docstrings"""
+        self.assertTrue(len(batch.__doc__ or "") >= 1)
+        for func in (batch.post_batch, batch.run):
+            self.assertTrue(len(func.__doc__ or "") >= 1)
+
+
+class TestBatch(unittest.TestCase):
+    """Test the POST /api/v1/batch endpoint"""
+    @classmethod
+    def setUpClass(cls):
+        """Creates a state"""
+        state = State(name="Batch")
+        state.save()
+        cls.state_id = state.id
+        cls.client = app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Deletes the state and the cities created by the tests"""
+        state = models.storage.get(State, cls.state_id)
+        models.storage.delete_many(
+            models.storage.related(City, "state_id", state.id) + [state])
+
+    def post(self, requests, atomic=False):
+        """returns the JSON response to a batch of requests"""
+        with mock.patch.object(models.storage, "commit",
+                               wraps=models.storage.commit) as commit:
+            response = self.client.post("/api/v1/batch", json={
+                "requests": requests, "atomic": atomic})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(commit.call_count, int(data["committed"]))
+        return data
+
+    def cities(self):
+        """returns the names of the cities of the state"""
+        return sorted(city.name for city in models.storage.related(
+            City, "state_id", self.state_id))
+
+    def test_batch(self):
+        """Test that every request runs and the successful ones commit"""
+        path = "/api/v1/states/{}/cities".format(self.state_id)
+        data = self.post([
+            {"method": "POST", "path": path, "body": {"name": "One"}},
+            {"method": "POST", "path": path, "body": {"x": 1}},
+            {"method": "POST", "path": path, "body": {"name": "Two"}},
+            {"method": "GET", "path": "/api/v1/states/nope"},
+            {"method": "GET", "path": path + "?fields=name"}])
+        self.assertTrue(data["committed"])
+        self.assertEqual([r["status"] for r in data["responses"]],
+                         [201, 400, 201, 404, 200])
+        self.assertEqual(data["responses"][1]["body"],
+                         {"error": "Missing name"})
+        self.assertEqual(data["responses"][3]["body"], {"error": "Not found"})
+        self.assertEqual(sorted(city["name"] for city in
+                                data["responses"][4]["body"]),
+                         ["One", "Two"])
+        models.storage.close()
+        self.assertEqual(self.cities(), ["One", "Two"])
+        models.storage.delete_many(models.storage.related(
+            City, "state_id", self.state_id))
+
+    def test_atomic(self):
+        """Test that an atomic batch stops at its first error and rolls
+        back the requests before it"""
+        path = "/api/v1/states/{}".format(self.state_id)
+        data = self.post([
+            {"method": "PUT", "path": path, "body": {"name": "Renamed"}},
+            {"method": "POST", "path": path + "/cities",
+             "body": {"name": "Three"}},
+            {"method": "DELETE", "path": "/api/v1/states/nope"},
+            {"method": "GET", "path": "/api/v1/status"}], atomic=True)
+        self.assertFalse(data["committed"])
+        self.assertEqual([r["status"] for r in data["responses"]],
+                         [200, 201, 404])
+        models.storage.close()
+        self.assertEqual(models.storage.get(State, self.state_id).name,
+                         "Batch")
+        self.assertEqual(self.cities(), [])
+
+    def test_nested_begin(self):
+        """Test that a batch cannot be started inside another one"""
+        models.storage.begin()
+        try:
+            with self.assertRaises(RuntimeError):
+                models.storage.begin()
+        finally:
+            models.storage.rollback()
+        models.storage.begin()
+        models.storage.rollback()
+
+    def test_invalid(self):
+        """Test that a malformed batch is rejected before it runs"""
+        for data in ({}, {"requests": {}},
+                     {"requests": [{"method": "PATCH",
+                                    "path": "/api/v1/status"}]},
+                     {"requests": [{"method": "GET", "path": "/status"}]},
+                     {"requests": [{"method": "POST",
+                                    "path": "/api/v1/batch"}]}):
+            response = self.client.post("/api/v1/batch", json=data)
+            self.assertEqual(response.status_code, 400)
+        for outer, inner in (("/api/v1/batch/", "/api/v1/batch"),
+                             ("/api/v1/batch", "/api/v1/batch/?x=1")):
+            response = self.client.post(outer, json={"requests": [
+                {"method": "POST", "path": inner,
+                 "body": {"requests": []}}]})
+            self.assertEqual(response.status_code, 400)
+        saved = batch.max_batch_size
+        batch.max_batch_size = 1
+        try:
+            response = self.client.post("/api/v1/batch", json={"requests": [
+                {"method": "GET", "path": "/api/v1/status"}] * 2})
+            self.assertEqual(response.status_code, 400)
+        finally:
+            batch.max_batch_size = saved
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""
+Contains the TestCompressionDocs and TestCompression classes
+"""
+
+from api.v1 import compression
+from api.v1.app import app
+import gzip
+import inspect
+import models
+from models.state import State
+import pep8
+import unittest
+
+
+class TestCompressionDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the compression"""
+    def test_pep8_conformance_compression(self):
+        """Test that api/v1/compression.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/compression.py',
+                                    'tests/test_api/test_compression.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_compression_docstrings(self):
+        """Test for the module and function docstrings"""
+        self.assertTrue(len(compression.__doc__ or "") >= 1)
+        for name, func in inspect.getmembers(compression,
+                                             inspect.isfunction):
+            if func.__module__ == compression.__name__:
+                self.assertTrue(len(func.__doc__ or "") >= 1, name)
+
+
+class TestCompression(unittest.TestCase):
+    """Test the negotiated compression of the API responses"""
+    @classmethod
+    def setUpClass(cls):
+        """Creates enough states for a page above the threshold"""
+        cls.states = [State(name="Compressed {}".format(i) * 4)
+                      for i in range(40)]
+        models.storage.new_many(cls.states)
+        cls.client = app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Deletes the states"""
+        models.storage.delete_many(cls.states)
+
+    def test_gzip(self):
+        """Test that a large page is gzipped and smaller for it"""
+        plain = self.client.get("/api/v1/states?limit=40")
+        self.assertNotIn("Content-Encoding", plain.headers)
+        self.assertIn("Accept-Encoding", plain.headers["Vary"])
+        response = self.client.get("/api/v1/states?limit=40",
+                                   headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertLess(len(response.data) * 4, len(plain.data))
+        self.assertEqual(response.headers["ETag"],
+                         plain.headers["ETag"][:-1] + '-gzip"')
+
+    def test_threshold(self):
+        """Test that small bodies are sent as they are"""
+        response = self.client.get("/api/v1/status",
+                                   headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_unsupported_encoding(self):
+        """Test that an encoding the server lacks is not used"""
+        response = self.client.get("/api/v1/states?limit=40",
+                                   headers={"Accept-Encoding": "deflate"})
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_cache_and_revalidation(self):
+        """Test that compressed bodies are cached and revalidated"""
+        url = "/api/v1/states?limit=39"
+        headers = {"Accept-Encoding": "gzip"}
+        response = self.client.get(url, headers=headers)
+        etag = response.headers["ETag"]
+        key = (etag.strip('"')[:-len("-gzip")], "gzip")
+        self.assertEqual(compression.cache[key], response.data)
+        headers["If-None-Match"] = etag
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+"""
+Contains the TestConditionalDocs, TestConditional and TestFields classes
+"""
+
+from api.v1.app import app
+from api.v1.views import conditional
+import json
+import models
+from models.state import State
+import pep8
+import unittest
+
+
+class TestConditionalDocs(unittest.TestCase):
+    """Tests to check the documentation and style of conditional GETs"""
+    def test_pep8_conformance_conditional(self):
+        """Test that api/v1/views/conditional.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/conditional.py',
+                                    'tests/test_api/test_conditional.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_conditional_docstrings(self):
+        """Test for the module and function docstrings"""
+        self.assertTrue(len(conditional.__doc__ or "") >= 1)
+        for func in (conditional.collection_etag, conditional.object_etag,
+                     conditional.conditional, conditional.object_response,
+                     conditional.requested_fields):
+            self.assertTrue(len(func.__doc__ or "") >= 1)
+
+
+class TestConditional(unittest.TestCase):
+    """Test the ETags and 304 responses of the API"""
+    @classmethod
+    def setUpClass(cls):
+        """Creates a state"""
+        cls.state = State(name="Conditional")
+        cls.state.save()
+        cls.client = app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Deletes the state"""
+        models.storage.delete(models.storage.get(State, cls.state.id))
+        models.storage.save()
+
+    def revalidate(self, url):
+        """returns the ETag of url and the response to revalidating it"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        return etag, self.client.get(url, headers={"If-None-Match": etag})
+
+    def test_collection_not_modified(self):
+        """Test that an unchanged page is revalidated without reading it"""
+        etag, response = self.revalidate("/api/v1/states?limit=2")
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+        page = models.storage.page
+
+        def no_page(*args, **kwargs):
+            """fails the test"""
+            raise AssertionError("page read on revalidation")
+        models.storage.page = no_page
+        try:
+            response = self.client.get("/api/v1/states?limit=2",
+                                       headers={"If-None-Match": etag})
+        finally:
+            del models.storage.page
+            self.assertIs(models.storage.page.__func__, page.__func__)
+        self.assertEqual(response.status_code, 304)
+        other = self.client.get("/api/v1/states?limit=1")
+        self.assertNotEqual(other.headers["ETag"], etag)
+
+    def test_collection_modified(self):
+        """Test that a write to the class changes the ETag"""
+        etag, response = self.revalidate("/api/v1/states")
+        self.assertEqual(response.status_code, 304)
+        state = State(name="New")
+        state.save()
+        response = self.client.get("/api/v1/states",
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        models.storage.delete(state)
+        models.storage.save()
+
+    def test_collection_representations(self):
+        """Test that the page and the stream of a URL have their own ETags
+        and vary on Accept"""
+        etag, response = self.revalidate("/api/v1/states")
+        self.assertIn("Accept", response.headers["Vary"])
+        ndjson = {"Accept": "application/x-ndjson"}
+        response = self.client.get("/api/v1/states", headers=dict(
+            ndjson, **{"If-None-Match": etag}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertIn("Accept", response.headers["Vary"])
+        response.close()
+        response = self.client.get("/api/v1/states", headers=dict(
+            ndjson, **{"If-None-Match": response.headers["ETag"]}))
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("Accept", response.headers["Vary"])
+
+    def test_object_etag(self):
+        """Test that an object ETag follows its updated_at"""
+        url = "/api/v1/states/{}".format(self.state.id)
+        etag, response = self.revalidate(url)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.put(url, json={"name": "Renamed"})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["name"], "Renamed")
+
+
+class TestFields(unittest.TestCase):
+    """Test the fields parameter of the API GET endpoints"""
+    @classmethod
+    def setUpClass(cls):
+        """Creates a state"""
+        cls.state = State(name="Sparse")
+        cls.state.save()
+        cls.client = app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Deletes the state"""
+        models.storage.delete(models.storage.get(State, cls.state.id))
+        models.storage.save()
+
+    def test_object_fields(self):
+        """Test that an object is returned with the requested keys only"""
+        url = "/api/v1/states/{}".format(self.state.id)
+        response = self.client.get(url + "?fields=id,name,nope")
+        self.assertEqual(response.get_json(),
+                         {"id": self.state.id, "name": "Sparse"})
+        etag = response.headers["ETag"]
+        self.assertNotEqual(self.client.get(url).headers["ETag"], etag)
+        self.assertIn("created_at", self.client.get(url).get_json())
+
+    def test_collection_fields(self):
+        """Test that pages and streams carry the requested keys only"""
+        response = self.client.get("/api/v1/states?fields=name")
+        self.assertEqual(response.status_code, 200)
+        states = response.get_json()
+        self.assertIn({"name": "Sparse"}, states)
+        self.assertTrue(all(list(st) in (["name"], []) for st in states))
+        response = self.client.get("/api/v1/states?stream=1&fields=id")
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        self.assertIn({"id": self.state.id}, lines)
+        self.assertTrue(all(list(st) == ["id"] for st in lines))
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""
+Contains the TestPaginationDocs and TestPagination classes
+"""
+
+from api.v1.app import app
+from api.v1.views import pagination
+import inspect
+import json
+import models
+from models.city import City
+from models.engine.pagination import encode_cursor
+from models.state import State
+import pep8
+import unittest
+
+
+class TestPaginationDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the pagination"""
+    def test_pep8_conformance_pagination(self):
+        """Test that api/v1/views/pagination.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/pagination.py',
+                                    'tests/test_api/test_pagination.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pagination_docstrings(self):
+        """Test for the module and paginate docstrings"""
+        self.assertTrue(len(pagination.__doc__ or "") >= 1)
+        self.assertTrue(len(pagination.paginate.__doc__ or "") >= 1)
+
+
+class TestPagination(unittest.TestCase):
+    """Test the limit and cursor parameters of the API collections"""
+    @classmethod
+    def setUpClass(cls):
+        """Creates a state with 7 cities"""
+        cls.state = State(name="Paginated")
+        cls.cities = [City(name="City {}".format(i), state_id=cls.state.id)
+                      for i in range(7)]
+        models.storage.new_many([cls.state] + cls.cities)
+        cls.client = app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Deletes the objects created by setUpClass"""
+        models.storage.delete_many(cls.cities + [cls.state])
+
+    def test_follow_links(self):
+        """Test that following the Link headers returns every city once"""
+        url = "/api/v1/states/{}/cities?limit=3".format(self.state.id)
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [city["id"] for city in response.get_json()]
+            pages += 1
+            url = None
+            if "Link" in response.headers:
+                link = response.headers["Link"]
+                self.assertTrue(link.endswith('>; rel="next"'))
+                self.assertIn("cursor=" + response.headers["X-Next-Cursor"],
+                              link)
+                url = link[1:link.index(">")]
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(ids), sorted(city.id for city in self.cities))
+
+    def test_max_page_size(self):
+        """Test that the page size is capped and checked"""
+        saved = pagination.max_page_size
+        pagination.max_page_size = 5
+        try:
+            url = "/api/v1/states/{}/cities".format(self.state.id)
+            for query in ("", "?limit=50"):
+                response = self.client.get(url + query)
+                self.assertEqual(len(response.get_json()), 5)
+                self.assertIn("limit=5", response.headers["Link"])
+        finally:
+            pagination.max_page_size = saved
+        for query in ("?limit=0", "?limit=x", "?cursor=bad",
+                      "?cursor=" + encode_cursor([1], "x"),
+                      "?cursor=" + encode_cursor(True, "x")):
+            self.assertEqual(self.client.get(url + query).status_code, 400)
+
+    def test_collections(self):
+        """Test that every collection returns a list"""
+        for url in ("/api/v1/states", "/api/v1/users", "/api/v1/amenities",
+                    "/api/v1/states/{}/cities".format(self.state.id),
+                    "/api/v1/cities/{}/places".format(self.cities[0].id),
+                    "/api/v1/places/missing/reviews"):
+            response = self.client.get(url + "?limit=1")
+            if url.endswith("missing/reviews"):
+                self.assertEqual(response.status_code, 404)
+                continue
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.get_json()), 1)
+
+    def test_stream(self):
+        """Test that the NDJSON stream returns the whole collection"""
+        url = "/api/v1/states/{}/cities".format(self.state.id)
+        for query, headers in (("?stream=1", {}),
+                               ("", {"Accept": "application/x-ndjson"})):
+            response = self.client.get(url + query, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, "application/x-ndjson")
+            self.assertTrue(response.is_streamed)
+            self.assertNotIn("Link", response.headers)
+            lines = response.get_data(as_text=True).splitlines()
+            ids = [json.loads(line)["id"] for line in lines]
+            self.assertEqual(sorted(ids),
+                             sorted(city.id for city in self.cities))
+        response = self.client.get("/api/v1/states?stream=1")
+        names = [json.loads(line).get("name") for line in
+                 response.get_data(as_text=True).splitlines()]
+        self.assertIn("Paginated", names)
+        self.assertEqual(len(names), models.storage.count(State))
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""
+Contains the TestPlacesSearchDocs and TestPlacesSearch classes
+"""
+
+from api.v1.app import app
+from api.v1.views import places
+import models
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+import pep8
+import unittest
+
+
+class TestPlacesSearchDocs(unittest.TestCase):
+    """Tests to check the documentation and style of places_search"""
+    def test_pep8_conformance_places(self):
+        """Test that api/v1/views/places.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/places.py',
+                                    'tests/test_api/test_places_search.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_places_search_docstrings(self):
+        """Test for the places_search and storage method docstrings"""
+        self.assertTrue(len(places.places_search.__doc__ or "") >= 1)
+        self.assertTrue(
+            len(models.storage.places_search.__doc__ or "") >= 1)
+
+
+class TestPlacesSearch(unittest.TestCase):
+    """Test the POST /api/v1/places_search endpoint"""
+    @classmethod
+    def setUpClass(cls):
+        """Creates 2 states of 3 cities with a place each, and amenities
+        1 and 2 in the first place and 3 in the second"""
+        cls.user = User(email="search@hbnb.io", password="pwd")
+        cls.states = [State(name="Search {}".format(i)) for i in range(2)]
+        cls.cities = [City(name="City {}".format(i),
+                           state_id=cls.states[i // 2].id)
+                      for i in range(3)]
+        cls.places = [Place(name="Place {}".format(i), user_id=cls.user.id,
+                            city_id=cls.cities[i].id) for i in range(3)]
+        cls.amenities = [Amenity(name="Amenity {}".format(i))
+                         for i in range(3)]
+        for amenity, place in zip(cls.amenities, cls.places[:1] * 2 +
+                                  cls.places[1:2]):
+            if models.storage_t == "db":
+                place.amenities.append(amenity)
+            else:
+                amenity.place_id = place.id
+        models.storage.new_many([cls.user] + cls.states + cls.cities +
+                                cls.places + cls.amenities)
+        cls.ids = [place.id for place in cls.places]
+        cls.client = app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Deletes the objects created by setUpClass"""
+        models.storage.close()
+        objs = [models.storage.get(type(obj), obj.id) for obj in
+                cls.places + cls.amenities + cls.cities + cls.states +
+                [cls.user]]
+        models.storage.delete_many([obj for obj in objs if obj])
+
+    def search(self, **data):
+        """returns the IDs of the created places found for data"""
+        response = self.client.post("/api/v1/places_search", json=data)
+        self.assertEqual(response.status_code, 200)
+        ids = [place["id"] for place in response.get_json()]
+        self.assertEqual(ids, sorted(ids))
+        return sorted(self.ids.index(id) for id in ids if id in self.ids)
+
+    def test_locations(self):
+        """Test that states and cities select the places of their cities"""
+        s, c = self.states, self.cities
+        self.assertEqual(self.search(), [0, 1, 2])
+        self.assertEqual(self.search(states=[], cities=[]), [0, 1, 2])
+        self.assertEqual(self.search(states=[s[0].id]), [0, 1])
+        self.assertEqual(self.search(cities=[c[2].id]), [2])
+        self.assertEqual(self.search(states=[s[1].id], cities=[c[0].id]),
+                         [0, 2])
+        self.assertEqual(self.search(states=["nope"], cities=["nope"]), [])
+
+    def test_amenities(self):
+        """Test that the places found have every amenity"""
+        a, s = [amenity.id for amenity in self.amenities], self.states
+        self.assertEqual(self.search(amenities=[a[0]]), [0])
+        self.assertEqual(self.search(amenities=[a[1], a[0], a[0]]), [0])
+        self.assertEqual(self.search(amenities=[a[2]]), [1])
+        self.assertEqual(self.search(amenities=[a[0], a[2]]), [])
+        self.assertEqual(self.search(amenities=[a[0], "nope"]), [])
+        self.assertEqual(self.search(amenities=a[:2], states=[s[0].id]),
+                         [0])
+        self.assertEqual(self.search(amenities=a[:2], states=[s[1].id]),
+                         [])
+
+    def test_fields_and_errors(self):
+        """Test the fields parameter and the invalid bodies"""
+        response = self.client.post(
+            "/api/v1/places_search?fields=name",
+            json={"cities": [self.cities[1].id]})
+        self.assertEqual(response.get_json(), [{"name": "Place 1"}])
+        for data in ("nope", [], {"states": "nope"}, {"amenities": [1]}):
+            response = self.client.post("/api/v1/places_search", json=data)
+            self.assertEqual(response.status_code, 400)
@@ -127,6 +127,17 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(d['name'], "Holberton")
         self.assertEqual(d['my_number'], 89)
 
+    def test_to_dict_fields(self):
+        """Test that to_dict(fields=) returns only the requested keys"""
+        my_model = BaseModel()
+        my_model.name = "Holberton"
+        d = my_model.to_dict(fields=["name", "created_at", "nope"])
+        self.assertEqual(d, {"name": "Holberton",
+                             "created_at": my_model.to_dict()["created_at"]})
+        self.assertEqual(my_model.to_dict(fields=["__class__"]),
+                         {"__class__": "BaseModel"})
+        self.assertEqual(my_model.to_dict(fields=[]), {})
+
     def test_to_dict_values(self):
         """test that values in dict returned from to_dict are correct"""
         t_format = "%Y-%m-%dT%H:%M:%S.%f"
@@ -17,7 +17,12 @@ from models.user import User
 import json
 import os
 import pep8
+import sqlalchemy
+from sqlalchemy import create_engine, event
+import hashlib
+import importlib
 import unittest
+from unittest import mock
 DBStorage = db_storage.DBStorage
 classes = {"Amenity": Amenity, "City": City, "Place": Place,
            "Review": Review, "State": State, "User": User}
@@ -114,3 +119,443 @@ class TestFileStorage(unittest.TestCase):
     @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
     def test_save(self):
         """Test that save properly saves objects to file.json"""
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_stream_matches_all(self):
+        """Test that stream yields the objects returned by all"""
+        st = State(name="ARABASTA")
+        st.save()
+        for cls in (None, State, "State"):
+            with self.subTest(cls=cls):
+                streamed = models.storage.stream(cls, chunk=2)
+                self.assertEqual(sorted(o.id for o in streamed),
+                                 sorted(o.id for o in
+                                        models.storage.all(cls).values()))
+        st.delete()
+        models.storage.save()
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_get_and_get_many(self):
+        """Test get from the identity map and get_many with one query"""
+        states = [State(name=str(i)) for i in range(3)]
+        for st in states:
+            st.save()
+        self.assertIs(models.storage.get(State, states[0].id), states[0])
+        self.assertIs(models.storage.get("State", states[0].id), states[0])
+        self.assertIsNone(models.storage.get(City, states[0].id))
+        self.assertIsNone(models.storage.get("NotAClass", states[0].id))
+        ids = [states[2].id, "missing", states[0].id]
+        self.assertEqual(models.storage.get_many(State, ids),
+                         [states[2], states[0]])
+        self.assertEqual(models.storage.get_many("NotAClass", ids), [])
+        for st in states:
+            st.delete()
+        models.storage.save()
+
+
+class TestDBStoragePool(unittest.TestCase):
+    """Test the connection pool settings and statistics"""
+    def test_pool_options(self):
+        """Test that pool_options reads the HBNB_MYSQL_* variables"""
+        env = {"HBNB_MYSQL_POOL_SIZE": "20", "HBNB_MYSQL_MAX_OVERFLOW": "5",
+               "HBNB_MYSQL_POOL_TIMEOUT": "2.5",
+               "HBNB_MYSQL_POOL_RECYCLE": "1800",
+               "HBNB_MYSQL_POOL_PRE_PING": "1"}
+        saved = {var: os.environ.pop(var, None) for var in env}
+        try:
+            self.assertEqual(DBStorage.pool_options(), {})
+            os.environ.update(env)
+            self.assertEqual(DBStorage.pool_options(),
+                             {"pool_size": 20, "max_overflow": 5,
+                              "pool_timeout": 2.5, "pool_recycle": 1800,
+                              "pool_pre_ping": True})
+        finally:
+            for var, value in saved.items():
+                os.environ.pop(var, None)
+                if value is not None:
+                    os.environ[var] = value
+
+    def test_pool_stats(self):
+        """Test that pool_stats reports checkouts and their wait"""
+        engine = create_engine("sqlite://", poolclass=db_storage.
+                               TimedQueuePool, pool_size=1, max_overflow=0,
+                               pool_timeout=0.1)
+        storage = DBStorage(engine)
+        waits = storage.pool_stats()["waits"]
+        conn = engine.connect()
+        stats = storage.pool_stats()
+        self.assertEqual(stats["pool"], "TimedQueuePool")
+        self.assertEqual(stats["size"], 1)
+        self.assertEqual(stats["checked_out"], 1)
+        self.assertEqual(stats["waits"], waits + 1)
+        with self.assertRaises(sqlalchemy.exc.TimeoutError):
+            engine.connect()
+        conn.close()
+        stats = storage.pool_stats()
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreaterEqual(stats["max_wait"], 0.1)
+        self.assertGreaterEqual(stats["wait_time"], stats["max_wait"])
+        engine.dispose()
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestDBStorageLoad(unittest.TestCase):
+    """Test that the nested listings load relationships eagerly"""
+    @classmethod
+    def setUpClass(cls):
+        """Creates three states, each with two cities with a place"""
+        cls.objs = []
+        user = User(email="load@hbnb.io", password="pwd")
+        cls.objs.append(user)
+        for i in range(3):
+            state = State(name="State {}".format(i))
+            cls.objs.append(state)
+            for j in range(2):
+                city = City(name="City {}".format(j), state_id=state.id)
+                place = Place(name="Place", city_id=city.id,
+                              user_id=user.id)
+                review = Review(text="Review", place_id=place.id,
+                                user_id=user.id)
+                cls.objs.extend((city, place, review))
+        cls.objs.append(Amenity(name="Wifi"))
+        for obj in cls.objs:
+            models.storage.new(obj)
+        models.storage.save()
+        cls.engine = models.storage._DBStorage__engine
+        # counts the queries of uncached reads
+        cls.cache = models.storage._DBStorage__cache
+        models.storage._DBStorage__cache = db_storage.ReadCache()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Deletes the objects created by setUpClass"""
+        models.storage._DBStorage__cache = cls.cache
+        for obj in reversed(cls.objs):
+            models.storage.delete(obj)
+        models.storage.save()
+
+    def queries(self, app, url):
+        """returns the number of SELECTs issued by a request to url"""
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            """records a statement"""
+            statements.append(statement)
+        models.storage.close()
+        event.listen(self.engine, "before_cursor_execute", count)
+        try:
+            response = app.test_client().get(url)
+        finally:
+            event.remove(self.engine, "before_cursor_execute", count)
+        self.assertEqual(response.status_code, 200)
+        return len(statements)
+
+    def test_all_load(self):
+        """Test that all(load=) loads nested paths in one query each"""
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            """records a statement"""
+            statements.append(statement)
+        models.storage.close()
+        event.listen(self.engine, "before_cursor_execute", count)
+        try:
+            states = models.storage.all(
+                State, load=["cities.places.reviews"]).values()
+            reviews = [r for s in states for c in s.cities
+                       for p in c.places for r in p.reviews]
+        finally:
+            event.remove(self.engine, "before_cursor_execute", count)
+        self.assertGreaterEqual(len(reviews), 6)
+        self.assertEqual(len(statements), 4)
+        self.assertNotIn("cities", states.__iter__().__next__().to_dict())
+        with self.assertRaises(ValueError):
+            models.storage.all(State, load=["name"])
+
+    def test_web_flask_queries(self):
+        """Test the query count of the pages listing cities by state"""
+        for name, url, count in (("8-cities_by_states",
+                                  "/cities_by_states", 2),
+                                 ("10-hbnb_filters", "/hbnb_filters", 3)):
+            app = importlib.import_module("web_flask." + name).app
+            self.assertEqual(self.queries(app, url), count, url)
+
+    def test_api_queries(self):
+        """Test the query count of the nested API listings"""
+        from api.v1.app import app
+        state = self.objs[1]
+        city, place = self.objs[2], self.objs[3]
+        for url in ("/api/v1/states/{}/cities".format(state.id),
+                    "/api/v1/cities/{}/places".format(city.id),
+                    "/api/v1/places/{}/reviews".format(place.id)):
+            # the parent, the collection version (ETag) and the page
+            self.assertEqual(self.queries(app, url), 3, url)
+
+    def test_stats_queries(self):
+        """Test that /stats counts every class with one query"""
+        from api.v1.app import app
+        self.assertEqual(self.queries(app, "/api/v1/stats"), 1)
+        counts = models.storage.counts()
+        self.assertEqual(counts["State"], models.storage.count(State))
+        self.assertEqual(counts["Place"], models.storage.count("Place"))
+        self.assertGreaterEqual(counts["Review"], 6)
+        self.assertEqual(sum(counts.values()), models.storage.count())
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestDBStorageBulk(unittest.TestCase):
+    """Test the bulk methods of DBStorage"""
+    def test_bulk_methods(self):
+        """Test new_many, update_many and delete_many"""
+        engine = models.storage._DBStorage__engine
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            """records an INSERT or UPDATE statement of a model table"""
+            if statement.split()[0] in ("INSERT", "UPDATE") and \
+                    "table_versions" not in statement:
+                statements.append(statement)
+        states = [State(name=str(i)) for i in range(50)]
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            models.storage.new_many(states)
+            updated = models.storage.update_many(
+                State, {states[0].id: {"name": "a", "id": "x"},
+                        states[1].id: {"name": "b"}, "missing": {}})
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(updated, 2)
+        self.assertEqual(states[0].name, "a")
+        models.storage.close()
+        self.assertEqual(models.storage.get(State, states[0].id).name, "a")
+        self.assertEqual(models.storage.get(State, states[1].id).name, "b")
+        self.assertEqual(models.storage.get(State, states[2].id).name, "2")
+        models.storage.delete_many(models.storage.get_many(
+            State, [st.id for st in states]))
+        self.assertEqual(models.storage.get_many(
+            State, [st.id for st in states]), [])
+
+    def test_update_many_setattr(self):
+        """Test that update_many hashes passwords and skips non-columns"""
+        user = User(email="bulk@hbnb.io", password="old")
+        models.storage.new_many([user])
+        updated = models.storage.update_many(
+            User, {user.id: {"password": "new", "bogus": 1,
+                             "first_name": "Bulk"}})
+        self.assertEqual(updated, 1)
+        models.storage.close()
+        user = models.storage.get(User, user.id)
+        self.assertEqual(user.password,
+                         hashlib.md5("new".encode()).hexdigest())
+        self.assertEqual(user.first_name, "Bulk")
+        self.assertFalse(hasattr(user, "bogus"))
+        models.storage.delete_many([user])
+
+    def test_version_across_workers(self):
+        """Test that a write of another worker changes version() even
+        within the same second and without touching updated_at (another
+        process's writes only show once its read cache expires)"""
+        engine = models.storage._DBStorage__engine
+        saved = models.storage._DBStorage__cache
+        models.storage._DBStorage__cache = db_storage.ReadCache(0, 60)
+        self.addCleanup(setattr, models.storage, "_DBStorage__cache", saved)
+        state = State(name="Version")
+        models.storage.new_many([state])
+        version = models.storage.version(State)
+        with mock.patch.dict(os.environ):
+            os.environ.pop("HBNB_ENV", None)
+            worker = DBStorage(engine)
+        worker.reload()
+        try:
+            other = worker.get(State, state.id)
+            other.name = "Worker"
+            worker.new(other)
+            worker.save()
+            models.storage.close()
+            self.assertNotEqual(models.storage.version(State), version)
+            version = models.storage.version(State)
+            worker.update_many(State, {state.id: {"name": "Worker 2"}})
+        finally:
+            worker.close()
+        models.storage.close()
+        self.assertNotEqual(models.storage.version(State), version)
+        self.assertEqual(models.storage.version("State"),
+                         models.storage.version(State))
+        self.assertEqual(models.storage.version("Nope"), "")
+        models.storage.delete_many([models.storage.get(State, state.id)])
+
+
+class TestReadCache(unittest.TestCase):
+    """Test the LRU/TTL read cache"""
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted"""
+        cache = db_storage.ReadCache(2, 60)
+        cache.put(("State", "a"), 1)
+        cache.put(("State", "b"), 2)
+        self.assertEqual(cache.get(("State", "a")), 1)
+        cache.put(("State", "c"), 3)
+        self.assertIsNone(cache.get(("State", "b")))
+        self.assertEqual(cache.get(("State", "c")), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_ttl_and_disabled(self):
+        """Test that expired entries and a zero size cache miss"""
+        cache = db_storage.ReadCache(10, 0)
+        cache.put(("State", "a"), 1)
+        self.assertIsNone(cache.get(("State", "a")))
+        cache = db_storage.ReadCache(0, 60)
+        cache.put(("State", "a"), 1)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_invalidate(self):
+        """Test that invalidate drops the object and bumps its class"""
+        cache = db_storage.ReadCache(10, 60)
+        version = cache.version("State")
+        cache.put(("State", "a"), 1, version)
+        cache.invalidate("State", "a")
+        self.assertIsNone(cache.get(("State", "a")))
+        self.assertEqual(cache.version("State"), version + 1)
+        cache.put(("State", "a"), 1, version)
+        self.assertIsNone(cache.get(("State", "a")))
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestDBStorageCache(unittest.TestCase):
+    """Test the read cache in front of DBStorage"""
+    def setUp(self):
+        """Enables the read cache and counts the statements"""
+        self.saved = models.storage._DBStorage__cache
+        models.storage._DBStorage__cache = db_storage.ReadCache(100, 60)
+        self.engine = models.storage._DBStorage__engine
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self.count)
+
+    def tearDown(self):
+        """Restores the read cache"""
+        event.remove(self.engine, "before_cursor_execute", self.count)
+        models.storage._DBStorage__cache = self.saved
+
+    def count(self, conn, cursor, statement, *args):
+        """records a statement"""
+        self.statements.append(statement)
+
+    def queries(self, function, *args):
+        """returns the result of function in a new session and its SELECTs"""
+        models.storage.close()
+        del self.statements[:]
+        result = function(*args)
+        return result, len(self.statements)
+
+    def test_get_count_related(self):
+        """Test that reads are cached and invalidated by writes"""
+        state = State(name="Cached")
+        city = City(name="City", state_id=state.id)
+        models.storage.new_many([state, city])
+        get = models.storage.get
+        related = models.storage.related
+        self.assertEqual(self.queries(get, State, state.id)[1], 1)
+        st, n = self.queries(get, State, state.id)
+        self.assertEqual((st.name, n), ("Cached", 0))
+        self.assertEqual(self.queries(models.storage.count, State)[1], 1)
+        self.assertEqual(self.queries(models.storage.count, State)[1], 0)
+        self.assertEqual(self.queries(models.storage.counts)[1], 1)
+        self.assertEqual(self.queries(models.storage.counts)[1], 0)
+        cities, n = self.queries(related, City, "state_id", state.id)
+        self.assertEqual(([c.id for c in cities], n), ([city.id], 1))
+        cities, n = self.queries(related, City, "state_id", state.id)
+        self.assertEqual(([c.id for c in cities], n), ([city.id], 0))
+        st = get(State, state.id)
+        st.name = "Changed"
+        models.storage.new(st)
+        models.storage.save()
+        st, n = self.queries(get, State, state.id)
+        self.assertEqual((st.name, n), ("Changed", 1))
+        models.storage.update_many(State, {state.id: {"name": "Bulk"}})
+        self.assertEqual(self.queries(get, State, state.id)[0].name, "Bulk")
+        count = models.storage.count(State)
+        models.storage.delete(get(City, city.id))
+        models.storage.save()
+        self.assertEqual(self.queries(related, City, "state_id",
+                                      state.id), ([], 1))
+        self.assertIsNone(self.queries(get, City, city.id)[0])
+        models.storage.delete(get(State, state.id))
+        models.storage.save()
+        self.assertEqual(models.storage.count(State), count - 1)
+        stats = models.storage.cache_stats()
+        self.assertGreater(stats["hits"], 0)
+        self.assertGreater(stats["invalidations"], 0)
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestDBStoragePage(unittest.TestCase):
+    """Test keyset pagination in DBStorage"""
+    def test_page(self):
+        """Test that pages follow each other under concurrent inserts"""
+        states = [State(name="Page {:02d}".format(i)) for i in range(25)]
+        cities = [City(name=str(i), state_id=states[0].id) for i in range(3)]
+        models.storage.new_many(states + cities)
+        seen = []
+        cursor = None
+        inserted = False
+        while True:
+            objs, cursor = models.storage.page(State, cursor, 10, "name")
+            seen += [st.id for st in objs if st.name.startswith("P")]
+            if cursor is not None and not inserted:
+                early, late = State(name="!early"), State(name="Page 99")
+                models.storage.new_many([early, late])
+                inserted = True
+            if cursor is None:
+                break
+        self.assertEqual(seen, [st.id for st in states + [late]])
+        objs, cursor = models.storage.page(City, None, 2, "name",
+                                           {"state_id": states[0].id})
+        self.assertEqual([c.id for c in objs], [c.id for c in cities[:2]])
+        objs, cursor = models.storage.page(City, cursor, 2, "name",
+                                           {"state_id": states[0].id})
+        self.assertEqual(([c.id for c in objs], cursor), ([cities[2].id],
+                                                          None))
+        objs, cursor = models.storage.page(State, None, 1)
+        self.assertEqual(len(objs), 1)
+        self.assertEqual(len(models.storage.page(State, cursor, 1)[0]), 1)
+        for args in ((State, None, 10, "nope"), (State, "bad", 10, "name"),
+                     ("Nope", None, 10, "name")):
+            with self.assertRaises(ValueError):
+                models.storage.page(*args)
+        for value, order_by in ((True, "name"), ([1], "name"),
+                                ({"a": 1}, "created_at"), (1, "created_at"),
+                                ("2017-09-28", "created_at")):
+            with self.subTest(value=value, order_by=order_by):
+                with self.assertRaises(ValueError):
+                    models.storage.page(State, db_storage.encode_cursor(
+                        value, "x"), 10, order_by)
+        models.storage.delete_many(cities + states + [early, late])
+
+    def test_page_fields(self):
+        """Test that page(fields=) selects only the requested columns"""
+        state = State(name="Page fields")
+        models.storage.new_many([state])
+        engine = models.storage._DBStorage__engine
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            """records a statement"""
+            statements.append(statement)
+        models.storage.close()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            objs, cursor = models.storage.page(
+                State, None, 100, "name", {"name": "Page fields"},
+                fields=["name", "nope"])
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn("created_at", statements[0].split("FROM")[0])
+        self.assertEqual(objs[0].to_dict(fields=["id", "name", "nope"]),
+                         {"id": state.id, "name": "Page fields"})
+        got = models.storage.get(State, state.id)
+        self.assertIn("created_at", got.to_dict())
+        models.storage.delete_many([got])
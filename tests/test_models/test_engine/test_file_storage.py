@@ -7,6 +7,7 @@ from datetime import datetime
 import inspect
 import models
 from models.engine import file_storage
+from models.engine.file_storage import Lazy
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -17,7 +18,10 @@ from models.user import User
 import json
 import os
 import pep8
+import sys
+import threading
 import unittest
+from unittest import mock
 FileStorage = file_storage.FileStorage
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
@@ -143,3 +147,559 @@ class TestFileStorage(unittest.TestCase):
         self.assertIsNone(obj2)
         l_obj = list(models.storage.all(State).values())[0].id
         self.assertNotEqual(str(models.storage.all()['State.' + l_obj]), None)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_fs_get_by_class_and_id(self):
+        """Test that get only matches objects of the requested class"""
+        st = State(name="ARABASTA")
+        models.storage.new(st)
+        self.assertIs(models.storage.get(State, st.id), st)
+        self.assertIs(models.storage.get("State", st.id), st)
+        self.assertIsNone(models.storage.get(City, st.id))
+        self.assertIsNone(models.storage.get("NotAClass", st.id))
+        self.assertIsNone(models.storage.get(State, None))
+        models.storage.delete(st)
+        self.assertIsNone(models.storage.get(State, st.id))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_cls_returns_class_bucket(self):
+        """Test that all(cls) returns the per-class bucket without copying"""
+        storage = FileStorage()
+        st = State(name="ARABASTA")
+        am = Amenity(name="Wifi")
+        storage.new(st)
+        storage.new(am)
+        states = storage.all(State)
+        self.assertIs(states, storage.all("State"))
+        self.assertIn("State." + st.id, states)
+        self.assertNotIn("Amenity." + am.id, states)
+        for obj in states.values():
+            self.assertIsInstance(obj, State)
+        self.assertEqual(storage.count(State), len(states))
+        self.assertEqual(storage.all("NotAClass"), {})
+        storage.delete(st)
+        storage.delete(am)
+        self.assertNotIn("State." + st.id, storage.all(State))
+        self.assertNotIn("Amenity." + am.id, storage.all(Amenity))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_journal_replay_and_compact(self):
+        """Test that journal mode appends records and compacts them"""
+        storage = FileStorage()
+        path = "file_journal_test.json"
+        saved = (FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__journal)
+        FileStorage._FileStorage__file_path = path
+        FileStorage._FileStorage__journal = True
+        FileStorage._FileStorage__pending.clear()
+        try:
+            st = State(name="ARABASTA")
+            gone = State(name="SKYPIEA")
+            st.save()
+            gone.save()
+            self.assertFalse(os.path.exists(path))
+            st.name = "WANO"
+            st.save()
+            gone.delete()
+            storage.save()
+            with open(path + ".log", "r") as f:
+                self.assertEqual(len(f.readlines()), 4)
+            storage.delete(st)
+            storage.reload()
+            self.assertEqual(storage.get(State, st.id).name, "WANO")
+            self.assertIsNone(storage.get(State, gone.id))
+            storage.compact()
+            self.assertFalse(os.path.exists(path + ".log"))
+            with open(path, "r") as f:
+                js = json.load(f)
+            self.assertEqual(js["State." + st.id]["name"], "WANO")
+            self.assertNotIn("State." + gone.id, js)
+            storage.delete(storage.get(State, st.id))
+        finally:
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__journal) = saved
+            FileStorage._FileStorage__pending.clear()
+            for p in (path, path + ".tmp", path + ".log", path + ".log.old"):
+                if os.path.exists(p):
+                    os.remove(p)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_failed_journal_write_stays_pending(self):
+        """Test that changes whose journal write failed are written by the
+        next save"""
+        storage = FileStorage()
+        path = "file_journal_test.json"
+        saved = (FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__journal)
+        FileStorage._FileStorage__file_path = path
+        FileStorage._FileStorage__journal = True
+        FileStorage._FileStorage__pending.clear()
+        try:
+            st = State(name="ARABASTA")
+            storage.new(st)
+            with mock.patch("os.fsync", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    storage.save()
+            storage.save()
+            with open(path + ".log", "r") as f:
+                records = [json.loads(line) for line in f
+                           if line.endswith("}\n")]
+            # the unsynced record and the one written again
+            self.assertEqual(["State." + st.id in record
+                              for record in records], [True, True])
+            storage.delete(st)
+        finally:
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__journal) = saved
+            FileStorage._FileStorage__pending.clear()
+            for p in (path, path + ".tmp", path + ".log", path + ".log.old"):
+                if os.path.exists(p):
+                    os.remove(p)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_close_during_compact(self):
+        """Test that close keeps the objects of a journal compacted while
+        the snapshot is being read"""
+        storage = FileStorage()
+        path = "file_journal_test.json"
+        saved = (FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__journal)
+        stream = FileStorage._FileStorage__stream
+        FileStorage._FileStorage__file_path = path
+        FileStorage._FileStorage__journal = True
+        FileStorage._FileStorage__pending.clear()
+        compactions = []
+
+        def compacting_stream(self, f):
+            """compacts the journal after the first item read, once or on
+            every read while compactions holds None"""
+            for item in stream(self, f):
+                yield item
+                if not compactions or compactions[0] is None:
+                    compactions.append(item[0])
+                    storage.compact()
+                    break
+        try:
+            snapshot = State(name="ARABASTA")
+            snapshot.save()
+            storage.compact()
+            journaled = State(name="WANO")
+            journaled.save()
+            self.assertTrue(os.path.exists(path + ".log"))
+            FileStorage._FileStorage__stamp = None
+            FileStorage._FileStorage__stream = compacting_stream
+            storage.close()
+            FileStorage._FileStorage__stream = stream
+            self.assertEqual(len(compactions), 1)
+            self.assertFalse(os.path.exists(path + ".log.old"))
+            self.assertIsNotNone(storage.get(State, snapshot.id))
+            self.assertIsNotNone(storage.get(State, journaled.id))
+            # files that change on every read: nothing is removed
+            compactions[:] = [None]
+            FileStorage._FileStorage__stamp = None
+            FileStorage._FileStorage__stream = compacting_stream
+            storage.close()
+            FileStorage._FileStorage__stream = stream
+            self.assertEqual(len(compactions),
+                             1 + FileStorage._FileStorage__sync_attempts)
+            self.assertIsNotNone(storage.get(State, journaled.id))
+            storage.delete_many([storage.get(State, snapshot.id),
+                                 storage.get(State, journaled.id)])
+        finally:
+            FileStorage._FileStorage__stream = stream
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__journal) = saved
+            FileStorage._FileStorage__pending.clear()
+            for p in (path, path + ".tmp", path + ".log", path + ".log.old"):
+                if os.path.exists(p):
+                    os.remove(p)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_reencodes_only_dirty_objects(self):
+        """Test that save reuses the JSON of unchanged objects"""
+        storage = FileStorage()
+        fragments = FileStorage._FileStorage__fragments
+        st = State(name="ARABASTA")
+        st.save()
+        key = "State." + st.id
+        self.assertIn(key, fragments)
+        cached = fragments[key]
+        storage.save()
+        self.assertIs(fragments[key], cached)
+        st.name = "WANO"
+        self.assertNotIn(key, fragments)
+        storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(json.load(f)[key]["name"], "WANO")
+        storage.delete(st)
+        self.assertNotIn(key, fragments)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_close_reloads_only_changes(self):
+        """Test that close skips an unchanged file and applies differences"""
+        storage = FileStorage()
+        kept = State(name="ARABASTA")
+        changed = State(name="SKYPIEA")
+        removed = State(name="WANO")
+        for obj in (kept, changed, removed):
+            storage.new(obj)
+        storage.save()
+        storage.close()
+        self.assertIs(storage.get(State, kept.id), kept)
+        self.assertIs(storage.get(State, changed.id), changed)
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        js["State." + changed.id]["name"] = "DRESSROSA"
+        js["State." + changed.id]["updated_at"] = "2030-01-01T00:00:00.000000"
+        del js["State." + removed.id]
+        with open("file.json", "w") as f:
+            json.dump(js, f)
+        storage.close()
+        self.assertIs(storage.get(State, kept.id), kept)
+        self.assertEqual(storage.get(State, changed.id).name, "DRESSROSA")
+        self.assertIsNone(storage.get(State, removed.id))
+        storage.delete(kept)
+        storage.delete(storage.get(State, changed.id))
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_reload_hydrates_lazily(self):
+        """Test that reloaded objects keep their dictionary until touched"""
+        storage = FileStorage()
+        st = State(name="ARABASTA")
+        st.save()
+        storage.reload()
+        obj = storage.get(State, st.id)
+        self.assertIsNot(obj, st)
+        self.assertIsInstance(obj, State)
+        self.assertEqual(Lazy.raw(obj)["name"], "ARABASTA")
+        storage.save()
+        self.assertIsNotNone(Lazy.raw(obj))
+        self.assertEqual(obj.name, "ARABASTA")
+        self.assertIs(type(obj), State)
+        self.assertIsNone(Lazy.raw(obj))
+        self.assertEqual(obj.created_at, st.created_at)
+        self.assertEqual(obj.to_dict(), st.to_dict())
+        storage.reload()
+        obj = storage.get(State, st.id)
+        obj.name = "WANO"
+        self.assertIs(type(obj), State)
+        self.assertEqual(obj.name, "WANO")
+        self.assertEqual(obj.id, st.id)
+        storage.delete(obj)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_related_follows_foreign_keys(self):
+        """Test that the foreign key indexes follow new, delete and setattr"""
+        storage = FileStorage()
+        st = State(name="ARABASTA")
+        other = State(name="WANO")
+        ct = City(name="ALUBARNA", state_id=st.id)
+        for obj in (st, other, ct):
+            storage.new(obj)
+        self.assertEqual(st.cities, [ct])
+        self.assertEqual(storage.related(City, "state_id", st.id), [ct])
+        ct.state_id = other.id
+        self.assertEqual(st.cities, [])
+        self.assertEqual(other.cities, [ct])
+        pl = Place(name="PALACE", city_id=ct.id)
+        storage.new(pl)
+        rv = Review(text="Nice", place_id=pl.id)
+        storage.new(rv)
+        self.assertEqual(ct.places, [pl])
+        self.assertEqual(pl.reviews, [rv])
+        storage.delete(rv)
+        self.assertEqual(pl.reviews, [])
+        for obj in (st, other, ct, pl):
+            storage.delete(obj)
+        self.assertEqual(other.cities, [])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_is_safe_to_iterate_while_writing(self):
+        """Test that dictionaries from all() never change under a reader"""
+        storage = FileStorage()
+        errors = []
+        done = threading.Event()
+
+        def write():
+            """creates and deletes states"""
+            for i in range(100):
+                states = [State(name=str(j)) for j in range(50)]
+                for st in states:
+                    storage.new(st)
+                    st.name = "renamed"
+                for st in states:
+                    storage.delete(st)
+            done.set()
+
+        def read():
+            """iterates all() and all(State) until the writer is done"""
+            try:
+                while not done.is_set():
+                    states = storage.all(State)
+                    before = len(states)
+                    for key in states:
+                        str(key)
+                    for key in storage.all():
+                        pass
+                    self.assertEqual(len(states), before)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write)]
+        threads += [threading.Thread(target=read) for i in range(3)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_groups_writes_in_flush_window(self):
+        """Test that concurrent saves are written by the background flusher"""
+        storage = FileStorage()
+        FileStorage._FileStorage__flush_window = 0.005
+        flushes = FileStorage._FileStorage__flushes
+        states = [State(name=str(i)) for i in range(20)]
+        try:
+            threads = [threading.Thread(target=st.save) for st in states]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            with open("file.json", "r") as f:
+                js = json.load(f)
+            for st in states:
+                self.assertIn("State." + st.id, js)
+            self.assertLess(FileStorage._FileStorage__flushes - flushes, 20)
+            for st in states:
+                storage.delete(st)
+            storage.save(wait=False)
+            storage.save()
+            with open("file.json", "r") as f:
+                js = json.load(f)
+            self.assertNotIn("State." + states[0].id, js)
+        finally:
+            FileStorage._FileStorage__flush_window = 0
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_flush_error_reaches_its_saves(self):
+        """Test that a failed write is raised by the saves it covered, even
+        if they wake up after a later write succeeded, and by no other"""
+        storage = FileStorage()
+        cond = FileStorage._FileStorage__flush_cond
+        real_wait = cond.wait
+        flushes = FileStorage._FileStorage__flushes
+        errors = []
+
+        def late_wait(timeout=None):
+            """lets the first save() wake up after the second write"""
+            result = real_wait(timeout)
+            if threading.current_thread() is late and \
+                    FileStorage._FileStorage__flushes > flushes:
+                cond.release()
+                while FileStorage._FileStorage__flushes < flushes + 2:
+                    threading.Event().wait(0.001)
+                cond.acquire()
+            return result
+
+        def save():
+            """records the error of a save()"""
+            try:
+                storage.save()
+            except OSError as e:
+                errors.append(e)
+        late = threading.Thread(target=save)
+        FileStorage._FileStorage__flush_window = 0.001
+        try:
+            with mock.patch.object(FileStorage, "_FileStorage__flush",
+                                   side_effect=[OSError("disk full"), None]):
+                with mock.patch.object(cond, "wait", late_wait):
+                    late.start()
+                    while FileStorage._FileStorage__flushes == flushes:
+                        threading.Event().wait(0.001)
+                    storage.save()
+                    late.join()
+        finally:
+            FileStorage._FileStorage__flush_window = 0
+        self.assertEqual([str(e) for e in errors], ["disk full"])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_stream_matches_all(self):
+        """Test that stream yields the objects returned by all"""
+        storage = FileStorage()
+        for cls in (None, State, "State"):
+            with self.subTest(cls=cls):
+                self.assertEqual(list(storage.stream(cls)),
+                                 list(storage.all(cls).values()))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_get_many(self):
+        """Test that get_many returns the objects found, in order"""
+        storage = FileStorage()
+        states = [State(name=str(i)) for i in range(3)]
+        for st in states:
+            storage.new(st)
+        ids = [states[2].id, "missing", states[0].id]
+        self.assertEqual(storage.get_many(State, ids), [states[2], states[0]])
+        self.assertEqual(storage.get_many(City, ids), [])
+        for st in states:
+            storage.delete(st)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_bulk_methods_write_once(self):
+        """Test new_many, update_many and delete_many with one write each"""
+        storage = FileStorage()
+        states = [State(name=str(i)) for i in range(50)]
+        writes = []
+        write = FileStorage._FileStorage__write
+
+        def counting_write(self, path, text):
+            """counts the writes"""
+            writes.append(path)
+            write(self, path, text)
+        FileStorage._FileStorage__write = counting_write
+        try:
+            storage.new_many(states)
+            with open("file.json", "r") as f:
+                js = json.load(f)
+            for st in states:
+                self.assertIn("State." + st.id, js)
+            updated = storage.update_many(
+                State, {states[0].id: {"name": "a", "id": "x"},
+                        states[1].id: {"name": "b"}, "missing": {}})
+            self.assertEqual(updated, 2)
+            self.assertEqual((states[0].name, states[0].id),
+                             ("a", js["State." + states[0].id]["id"]))
+            with open("file.json", "r") as f:
+                js = json.load(f)
+            self.assertEqual(js["State." + states[1].id]["name"], "b")
+            storage.delete_many(states)
+            with open("file.json", "r") as f:
+                js = json.load(f)
+            for st in states:
+                self.assertNotIn("State." + st.id, js)
+                self.assertIsNone(storage.get(State, st.id))
+        finally:
+            FileStorage._FileStorage__write = write
+        self.assertEqual(len(writes), 3)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_begin_commit_rollback(self):
+        """Test that a batch is written once, or read back on rollback"""
+        storage = FileStorage()
+        kept, renamed = State(name="kept"), State(name="renamed")
+        storage.new_many([kept, renamed])
+        writes = []
+        write = FileStorage._FileStorage__write
+
+        def counting_write(self, path, text):
+            """counts the writes"""
+            writes.append(path)
+            write(self, path, text)
+        FileStorage._FileStorage__write = counting_write
+        try:
+            storage.begin()
+            added = State(name="added")
+            added.save()
+            renamed.name = "new name"
+            renamed.save()
+            kept.delete()
+            storage.rollback()
+            self.assertEqual(writes, [])
+            self.assertIsNone(storage.get(State, added.id))
+            self.assertEqual(storage.get(State, renamed.id).name, "renamed")
+            self.assertEqual(storage.get(State, kept.id).name, "kept")
+            storage.begin()
+            added.save()
+            storage.get(State, renamed.id).delete()
+            storage.save()
+            self.assertEqual(writes, [])
+            storage.commit()
+            self.assertEqual(len(writes), 1)
+        finally:
+            FileStorage._FileStorage__write = write
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertIn("State." + added.id, js)
+        self.assertNotIn("State." + renamed.id, js)
+        storage.delete_many([kept, added])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_counts(self):
+        """Test that counts matches count for every class"""
+        storage = FileStorage()
+        counts = storage.counts()
+        self.assertEqual(set(counts), set(classes))
+        for name, cls in classes.items():
+            self.assertEqual(counts[name], storage.count(cls))
+        self.assertEqual(sum(counts.values()), storage.count())
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_page(self):
+        """Test keyset pagination on the sorted indexes"""
+        storage = FileStorage()
+        states = [State(name="Page {:02d}".format(i)) for i in range(25)]
+        cities = [City(name=str(i), state_id=states[0].id) for i in range(3)]
+        for obj in states + cities:
+            storage.new(obj)
+        filters = {"name": "Page 00"}
+        self.assertEqual(storage.page(State, filters=filters),
+                         ([states[0]], None))
+        seen = []
+        cursor = None
+        inserted = False
+        while True:
+            objs, cursor = storage.page(State, cursor, 10, "name")
+            seen += objs
+            if cursor is not None and not inserted:
+                early, late = State(name="!early"), State(name="Page 99")
+                storage.new(early)
+                storage.new(late)
+                inserted = True
+            if cursor is None:
+                break
+        self.assertEqual([st for st in seen if st in states + [early, late]],
+                         states + [late])
+        states[3].name = "Page 98"
+        objs, cursor = storage.page(State, None, 2, "name",
+                                    {"name": "Page 98"})
+        self.assertEqual((objs, cursor), ([states[3]], None))
+        storage.delete(late)
+        self.assertEqual(storage.page(State, None, 5, "name",
+                                      {"name": "Page 99"}), ([], None))
+        objs, cursor = storage.page(City, None, 2, "name",
+                                    {"state_id": states[0].id})
+        self.assertEqual(objs, cities[:2])
+        self.assertEqual(storage.page(City, cursor, 2, "name",
+                                      {"state_id": states[0].id}),
+                         ([cities[2]], None))
+        for args in ((State, None, 10, "nope"), (State, "bad", 10, "name"),
+                     ("Nope", None, 10, "name")):
+            with self.assertRaises(ValueError):
+                storage.page(*args)
+        for obj in states + cities + [early]:
+            storage.delete(obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_version(self):
+        """Test that version changes with every write to the class"""
+        storage = FileStorage()
+        state = State(name="Versioned")
+        versions = [storage.version(State)]
+        storage.new(state)
+        versions.append(storage.version(State))
+        state.name = "Changed"
+        versions.append(storage.version("State"))
+        city_version = storage.version(City)
+        storage.delete(state)
+        versions.append(storage.version(State))
+        self.assertEqual(len(set(versions)), 4)
+        self.assertEqual(storage.version(City), city_version)
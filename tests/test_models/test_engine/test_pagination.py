@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""
+Contains the TestPaginationDocs and TestPagination classes
+"""
+
+from datetime import datetime
+import inspect
+from models.engine import pagination
+import pep8
+import unittest
+
+
+class TestPaginationDocs(unittest.TestCase):
+    """Tests to check the documentation and style of pagination"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.pg_f = inspect.getmembers(pagination, inspect.isfunction)
+
+    def test_pep8_conformance_pagination(self):
+        """Test that models/engine/pagination.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/pagination.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_pagination(self):
+        """Test tests/test_models/test_pagination.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_pagination.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pagination_module_docstring(self):
+        """Test for the pagination.py module docstring"""
+        self.assertIsNot(pagination.__doc__, None,
+                         "pagination.py needs a docstring")
+        self.assertTrue(len(pagination.__doc__) >= 1,
+                        "pagination.py needs a docstring")
+
+    def test_pg_func_docstrings(self):
+        """Test for the presence of docstrings in pagination functions"""
+        for func in self.pg_f:
+            if func[1].__module__ != pagination.__name__:
+                continue
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} function needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} function needs a docstring".format(func[0]))
+
+
+class TestPagination(unittest.TestCase):
+    """Test the cursor functions"""
+    def test_round_trip(self):
+        """Test that decode_cursor returns what encode_cursor was given"""
+        date = datetime(2024, 1, 8, 11, 22, 23, 731615)
+        for value, decoded in (("Texas", "Texas"), (3, 3),
+                               (date, "2024-01-08T11:22:23.731615")):
+            cursor = pagination.encode_cursor(value, "some-id")
+            self.assertNotIn("=", cursor)
+            self.assertEqual(pagination.decode_cursor(cursor),
+                             (decoded, "some-id"))
+
+    def test_invalid_cursor(self):
+        """Test that decode_cursor rejects anything else"""
+        for cursor in ("", "not a cursor", "WzEsMl0", "e30"):
+            with self.assertRaises(ValueError):
+                pagination.decode_cursor(cursor)
@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+"""
+Contains the TestSQLiteStorageDocs and TestSQLiteStorage classes
+"""
+
+import inspect
+import models
+from models.engine import sqlite_storage
+from models.city import City
+from models.state import State
+import pep8
+import unittest
+SQLiteStorage = sqlite_storage.SQLiteStorage
+
+
+class TestSQLiteStorageDocs(unittest.TestCase):
+    """Tests to check the documentation and style of SQLiteStorage class"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.sls_f = inspect.getmembers(SQLiteStorage, inspect.isfunction)
+
+    def test_pep8_conformance_sqlite_storage(self):
+        """Test that models/engine/sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/sqlite_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_sqlite_storage(self):
+        """Test tests/test_models/test_sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_sqlite_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_sqlite_storage_module_docstring(self):
+        """Test for the sqlite_storage.py module docstring"""
+        self.assertIsNot(sqlite_storage.__doc__, None,
+                         "sqlite_storage.py needs a docstring")
+        self.assertTrue(len(sqlite_storage.__doc__) >= 1,
+                        "sqlite_storage.py needs a docstring")
+
+    def test_sqlite_storage_class_docstring(self):
+        """Test for the SQLiteStorage class docstring"""
+        self.assertIsNot(SQLiteStorage.__doc__, None,
+                         "SQLiteStorage class needs a docstring")
+        self.assertTrue(len(SQLiteStorage.__doc__) >= 1,
+                        "SQLiteStorage class needs a docstring")
+
+    def test_sls_func_docstrings(self):
+        """Test for the presence of docstrings in SQLiteStorage methods"""
+        for func in self.sls_f:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+@unittest.skipIf(type(models.storage) is not SQLiteStorage,
+                 "not testing sqlite storage")
+class TestSQLiteStorage(unittest.TestCase):
+    """Test the SQLiteStorage class"""
+    def test_wal_and_foreign_keys(self):
+        """Test that connections use WAL mode and enforce foreign keys"""
+        engine = models.storage._DBStorage__engine
+        with engine.connect() as conn:
+            mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+            fks = conn.exec_driver_sql("PRAGMA foreign_keys").scalar()
+        self.assertIn(mode, ("wal", "memory"))
+        self.assertEqual(fks, 1)
+
+    def test_foreign_keys_are_indexed(self):
+        """Test that the foreign key columns have an index"""
+        engine = models.storage._DBStorage__engine
+        with engine.connect() as conn:
+            for table, column in (("cities", "state_id"),
+                                  ("places", "city_id"),
+                                  ("places", "user_id"),
+                                  ("reviews", "place_id"),
+                                  ("reviews", "user_id")):
+                with self.subTest(table=table, column=column):
+                    indexes = conn.exec_driver_sql(
+                        "PRAGMA index_list({})".format(table)).fetchall()
+                    columns = []
+                    for index in indexes:
+                        columns += [row[2] for row in conn.exec_driver_sql(
+                            "PRAGMA index_info({})".format(index[1]))]
+                    self.assertIn(column, columns)
+
+    def test_storage_contract(self):
+        """Test new, save, get, count, all and delete"""
+        count = models.storage.count(City)
+        st = State(name="ARABASTA")
+        st.save()
+        ct = City(name="ALUBARNA", state_id=st.id)
+        ct.save()
+        self.assertIs(models.storage.get("City", ct.id), ct)
+        self.assertIsNone(models.storage.get(State, ct.id))
+        self.assertEqual(models.storage.count(City), count + 1)
+        self.assertIn("City." + ct.id, models.storage.all(City))
+        self.assertEqual(st.cities, [ct])
+        ct.delete()
+        st.delete()
+        models.storage.save()
+        self.assertEqual(models.storage.count(City), count)